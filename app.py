@@ -2,18 +2,20 @@
 
 import sys
 import os
-import shutil
-import pandas as pd
+import multiprocessing
 from PySide6.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit,
     QPushButton, QVBoxLayout, QHBoxLayout, QFormLayout,
     QFileDialog, QComboBox, QMessageBox, QProgressDialog, QSpinBox, QCheckBox
 )
 from PySide6.QtGui import QPixmap, QIcon, QDesktopServices
-from PySide6.QtCore import Qt, QUrl, QSize
+from PySide6.QtCore import Qt, QUrl, QSize, QThread, QObject, QRunnable, QThreadPool, QTimer, Signal
 from PIL.ImageQt import ImageQt
 
-from core import gerar_certificado as gerar_imagem_certificado
+from core import gerar_certificado as gerar_imagem_certificado, salvar_certificado, tamanho_modelo, formatar_carga_horaria, ATIVIDADES_SEM_NOME, MODOS_SAIDA, PERFIS_SAIDA, TAMANHO_FONTE_MINIMO, TAMANHO_FONTE_MAXIMO
+from cache_renderizacao import CacheRenderizacao
+from catalogo import carregar_catalogo, copiar_recursos_padrao
+from lote import GeradorEmLote, SAIDAS_LOTE, criar_saida, ler_planilha, montar_tarefas, resumir_erros, salvar_relatorio_erros
 
 def get_asset_path(relative_path):
     """
@@ -26,6 +28,51 @@ def get_asset_path(relative_path):
         base_path = os.path.dirname(os.path.abspath(__file__))
     return os.path.join(base_path, relative_path)
 
+class LoteThread(QThread):
+    """Executa o motor de lote fora da thread da interface, emitindo um resultado por certificado."""
+    resultado_pronto = Signal(dict)
+    falhou = Signal(str)
+
+    def __init__(self, tarefas, saida, pasta_cache=None, parent=None):
+        super().__init__(parent)
+        self.tarefas = tarefas
+        self.saida = saida
+        self.pasta_cache = pasta_cache
+
+    def run(self):
+        try:
+            cache = CacheRenderizacao(self.pasta_cache) if self.pasta_cache else None
+            for resultado in GeradorEmLote(saida=self.saida, cache=cache).executar(self.tarefas, cancelado=self.isInterruptionRequested):
+                self.resultado_pronto.emit(resultado)
+        except Exception as e:
+            self.falhou.emit(str(e))
+
+class PreviewSinais(QObject):
+    """Sinais da pré-visualização: (número da requisição, QImage) ou (número da requisição, mensagem de erro)."""
+    pronto = Signal(int, object)
+    falhou = Signal(int, str)
+
+class PreviewTarefa(QRunnable):
+    """
+    Renderiza a pré-visualização fora da thread da interface, já na resolução do QLabel.
+    Requisições que ficaram velhas antes de começar (o usuário continuou digitando) são descartadas.
+    """
+    def __init__(self, geracao, geracao_atual, data, tamanho_label, sinais):
+        super().__init__()
+        self.geracao, self.geracao_atual, self.data, self.tamanho_label, self.sinais = geracao, geracao_atual, data, tamanho_label, sinais
+
+    def run(self):
+        if self.geracao != self.geracao_atual(): return
+        try:
+            largura, altura = tamanho_modelo(self.data['template_path'])
+            escala = min(1.0, self.tamanho_label[0] / largura, self.tamanho_label[1] / altura)
+            sucesso, resultado = gerar_imagem_certificado(**self.data, escala=escala)
+            # copy() desvincula a QImage do buffer da imagem PIL, que deixa de existir ao fim da thread.
+            if sucesso: self.sinais.pronto.emit(self.geracao, ImageQt(resultado).copy())
+            else: self.sinais.falhou.emit(self.geracao, str(resultado))
+        except Exception as e:
+            self.sinais.falhou.emit(self.geracao, str(e))
+
 class MainWindow(QWidget):
     def __init__(self):
         super().__init__()
@@ -39,13 +86,14 @@ class MainWindow(QWidget):
         # (Dicionários e listas de configuração permanecem os mesmos)
         self.funcoes_horas = { 'Ouvinte': 5, 'Palestrante': 2, 'Apresentador(a)': 10, 'Organizador(a)': 10, 'Mediador(a)': 2, 'Debatedor(a)': 2, 'Outro': '' }
         self.tipos_de_atividade = [ "Palestra", "Mesa redonda", "Apresentação de trabalho", "Curso", "Oficina", "Projeto de extensão", "Evento científico", "Disciplina não curricular", "Atividade Institucionalizada", "Estágio extracurricular", "Curso de língua estrangeira", "Concurso de monografia", "Bolsa de Iniciação Científica", "Competição esportiva", "Outro" ]
-        self.atividades_sem_nome = ["Disciplina não curricular", "Bolsa de Iniciação Científica"]
+        self.atividades_sem_nome = ATIVIDADES_SEM_NOME
 
-        # Carrega os recursos a partir da nova pasta em "Documentos"
-        self.templates = self.load_resources(self.models_dir, ('.png', '.jpg', '.jpeg'))
+        # Carrega os recursos a partir da nova pasta em "Documentos" (pelo índice em catalogo.json)
+        catalogo = self.load_catalog()
+        self.templates = catalogo['modelos']
         self.template_path = os.path.join(self.models_dir, self.templates[0]) if self.templates else ""
         
-        self.fonts = self.load_fonts()
+        self.fonts = catalogo['fontes']
         self.font_paths = list(self.fonts.values())[0] if self.fonts else {}
         
         # --- Layouts e Widgets ---
@@ -66,13 +114,19 @@ class MainWindow(QWidget):
 
         self.template_combo = QComboBox(); self.template_combo.addItems(self.templates) if self.templates else None
         self.font_combo = QComboBox(); self.font_combo.addItems(self.fonts.keys()) if self.fonts else None
-        self.font_size_input = QSpinBox(); self.font_size_input.setRange(10, 200); self.font_size_input.setValue(50); self.font_size_input.setSuffix(" pt")
+        self.font_size_input = QSpinBox(); self.font_size_input.setRange(TAMANHO_FONTE_MINIMO, TAMANHO_FONTE_MAXIMO); self.font_size_input.setValue(50); self.font_size_input.setSuffix(" pt")
         self.evento_input = QLineEdit()
         self.italic_checkbox = QCheckBox("Nome do evento em itálico")
         self.atividade_combo = QComboBox(); self.atividade_combo.addItems(self.tipos_de_atividade)
         self.horas_input = QLineEdit()
+        self.formato_combo = QComboBox()
+        for modo, descricao in MODOS_SAIDA.items(): self.formato_combo.addItem(descricao, modo)
+        self.perfil_combo = QComboBox()
+        for perfil, config in PERFIS_SAIDA.items(): self.perfil_combo.addItem(config['descricao'], perfil)
+        self.saida_lote_combo = QComboBox()
+        for tipo, descricao in SAIDAS_LOTE.items(): self.saida_lote_combo.addItem(descricao, tipo)
         left_form.addRow("Selecionar Modelo:", self.template_combo); left_form.addRow("Fonte:", self.font_combo); left_form.addRow("Tamanho da Fonte:", self.font_size_input)
-        left_form.addRow("Nome do Evento:", self.evento_input); left_form.addRow("", self.italic_checkbox); left_form.addRow("Tipo de Atividade:", self.atividade_combo); left_form.addRow("Horas:", self.horas_input)
+        left_form.addRow("Nome do Evento:", self.evento_input); left_form.addRow("", self.italic_checkbox); left_form.addRow("Tipo de Atividade:", self.atividade_combo); left_form.addRow("Horas:", self.horas_input); left_form.addRow("Formato do PDF:", self.formato_combo); left_form.addRow("Qualidade do PDF:", self.perfil_combo); left_form.addRow("Saída do lote:", self.saida_lote_combo)
 
         self.pessoa_input = QLineEdit()
         self.doc_tipo_combo = QComboBox(); self.doc_tipo_combo.addItems(['Nenhum', 'CPF', 'Matrícula']); self.doc_input = QLineEdit()
@@ -114,6 +168,12 @@ class MainWindow(QWidget):
         }
         for signal, slot in connections.items(): signal.connect(slot)
         
+        # Pré-visualização: as edições são agrupadas por um atraso curto e renderizadas em uma thread própria.
+        self.preview_geracao = 0
+        self.preview_pool = QThreadPool(self); self.preview_pool.setMaxThreadCount(1)
+        self.preview_sinais = PreviewSinais(self); self.preview_sinais.pronto.connect(self.on_preview_ready); self.preview_sinais.falhou.connect(self.on_preview_failed)
+        self.preview_timer = QTimer(self); self.preview_timer.setSingleShot(True); self.preview_timer.setInterval(120); self.preview_timer.timeout.connect(self.render_preview)
+
         self.on_atividade_change(self.atividade_combo.currentText()); self.on_funcao_change(self.funcao_combo.currentText()); self.update_preview()
 
     def get_documents_path(self):
@@ -140,25 +200,12 @@ class MainWindow(QWidget):
             self.models_dir = os.path.join(app_data_path, 'Modelos')
             self.fonts_dir = os.path.join(app_data_path, 'Fontes')
             self.icons_dir = os.path.join(app_data_path, 'Icones')
+            self.app_data_path = app_data_path
             
-            # Cria as pastas se elas não existirem
-            os.makedirs(self.models_dir, exist_ok=True)
-            os.makedirs(self.fonts_dir, exist_ok=True)
-            os.makedirs(self.icons_dir, exist_ok=True)
-
-            # Copia os recursos padrão (empacotados com o app) para a pasta do usuário, se necessário.
-            default_dirs = {'Modelos': self.models_dir, 'Fontes': self.fonts_dir, 'Icones': self.icons_dir}
-            for dir_name, dest_path in default_dirs.items():
-                source_path = get_asset_path(dir_name)
-                if os.path.exists(source_path):
-                    for item in os.listdir(source_path):
-                        source_item = os.path.join(source_path, item)
-                        dest_item = os.path.join(dest_path, item)
-                        if not os.path.exists(dest_item):
-                            if os.path.isdir(source_item):
-                                shutil.copytree(source_item, dest_item)
-                            else:
-                                shutil.copy2(source_item, dest_item)
+            # Cria as pastas e copia os recursos padrão (empacotados com o app), se necessário.
+            # A cópia só é verificada item a item quando alguma das pastas mudou desde a última vez.
+            default_dirs = {get_asset_path(dir_name): dest_path for dir_name, dest_path in (('Modelos', self.models_dir), ('Fontes', self.fonts_dir), ('Icones', self.icons_dir))}
+            copiar_recursos_padrao(default_dirs, os.path.join(app_data_path, 'recursos.json'))
         except Exception as e:
             QMessageBox.critical(self, "Erro na Inicialização", f"Não foi possível criar as pastas de configuração em Documentos.\nErro: {e}")
 
@@ -168,21 +215,9 @@ class MainWindow(QWidget):
     def report_bug(self):
         reply = QMessageBox.question(self, 'Reportar Bug', "Você gostaria de reportar um bug?\nIsso abrirá seu cliente de email padrão.", QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes: QDesktopServices.openUrl(QUrl("mailto:yanndezedias16@gmail.com?subject=Report de Bug - Gerador de Certificados"))
-    def load_resources(self, directory, formats):
-        if not os.path.isdir(directory): return []
-        return [f for f in os.listdir(directory) if f.lower().endswith(formats)] or []
-    def load_fonts(self):
-        fonts_dict = {}
-        if not os.path.isdir(self.fonts_dir): return fonts_dict
-        for font_family in os.listdir(self.fonts_dir):
-            folder_path = os.path.join(self.fonts_dir, font_family)
-            if os.path.isdir(folder_path):
-                found_regular, found_italic = None, None
-                for file in os.listdir(folder_path):
-                    if 'italic' in file.lower() and file.lower().endswith('.ttf'): found_italic = os.path.join(folder_path, file)
-                    elif 'regular' in file.lower() and file.lower().endswith('.ttf'): found_regular = os.path.join(folder_path, file)
-                if found_regular: fonts_dict[font_family] = {'regular': found_regular, 'italic': found_italic if found_italic else found_regular}
-        return fonts_dict
+    def load_catalog(self):
+        try: return carregar_catalogo(self.fonts_dir, self.models_dir, os.path.join(self.app_data_path, 'catalogo.json'))
+        except Exception: return {'fontes': {}, 'modelos': []}
     def on_template_change(self, template_name): self.template_path = os.path.join(self.models_dir, template_name); self.update_preview()
     def on_font_change(self, font_name):
         if font_name in self.fonts: self.font_paths = self.fonts[font_name]; self.update_preview()
@@ -198,25 +233,36 @@ class MainWindow(QWidget):
         funcao = self.funcao_combo.currentText(); return self.funcao_custom_input.text() if funcao == "Outro" else funcao
     def get_current_data(self, for_preview=False):
         data = { "nome": self.pessoa_input.text() if not for_preview else self.pessoa_input.text() or "[Nome da Pessoa]", "funcao_participante": self.get_funcao_participante() if not for_preview else self.get_funcao_participante() or "[Função]", "tipo_atividade": self.atividade_combo.currentText(), "nome_evento": self.evento_input.text() if not for_preview else self.evento_input.text() or "[Nome do Evento]", "carga_horaria": self.horas_input.text(), "template_path": self.template_path, "doc_tipo": self.doc_tipo_combo.currentText(), "doc_numero": self.doc_input.text(), "font_path_regular": self.font_paths['regular'], "font_path_italic": self.font_paths['italic'], "font_size": self.font_size_input.value(), "use_italic": self.italic_checkbox.isChecked() }
-        horas = data['carga_horaria']; data['carga_horaria'] = f"{horas}h" if horas and not horas.endswith('h') else (horas or "[Horas]"); return data
+        data['carga_horaria'] = formatar_carga_horaria(data['carga_horaria']); return data
     def update_preview(self):
+        if hasattr(self, 'preview_timer'): self.preview_timer.start()
+    def resizeEvent(self, event):
+        super().resizeEvent(event); self.update_preview()
+    def render_preview(self):
         if not self.template_path or not self.font_paths: return
-        data = self.get_current_data(for_preview=True)
-        sucesso, resultado = gerar_imagem_certificado(**data)
-        if sucesso: img_qt = ImageQt(resultado); pixmap = QPixmap.fromImage(img_qt); self.preview_label.setPixmap(pixmap.scaled(self.preview_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
-        else: self.preview_label.setText(str(resultado)); self.preview_label.setPixmap(QPixmap())
+        self.preview_geracao += 1
+        data = self.get_current_data(for_preview=True); tamanho_label = (self.preview_label.width(), self.preview_label.height())
+        self.preview_pool.start(PreviewTarefa(self.preview_geracao, lambda: self.preview_geracao, data, tamanho_label, self.preview_sinais))
+    def on_preview_ready(self, geracao, img_qt):
+        if geracao != self.preview_geracao: return
+        pixmap = QPixmap.fromImage(img_qt); self.preview_label.setPixmap(pixmap.scaled(self.preview_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+    def on_preview_failed(self, geracao, erro):
+        if geracao != self.preview_geracao: return
+        self.preview_label.setText(erro); self.preview_label.setPixmap(QPixmap())
     def handle_individual_save(self):
         data = self.get_current_data()
         funcao = data['funcao_participante']; atividade = data['tipo_atividade']
         if not all([data['nome'], atividade, data['carga_horaria'], funcao]) or (self.evento_input.isEnabled() and not data['nome_evento']): QMessageBox.warning(self, "Campos Vazios", "Por favor, preencha todos os campos habilitados."); return
         if data['doc_tipo'] != 'Nenhum' and not data['doc_numero']: QMessageBox.warning(self, "Campo Obrigatório", "Por favor, preencha o Nº do Documento."); return
-        sucesso, imagem = gerar_imagem_certificado(**data)
-        if sucesso:
-            default_filename = f"certificado_{data['nome'].replace(' ', '_')}.pdf"; file_name, _ = QFileDialog.getSaveFileName(self, "Salvar Certificado", default_filename, "PDF Files (*.pdf)");
-            if file_name: imagem.convert("RGB").save(file_name); QMessageBox.information(self, "Sucesso", f"Certificado salvo em:\n{file_name}")
+        default_filename = f"certificado_{data['nome'].replace(' ', '_')}.pdf"; file_name, _ = QFileDialog.getSaveFileName(self, "Salvar Certificado", default_filename, "PDF Files (*.pdf)");
+        if not file_name: return
+        sucesso, resultado = salvar_certificado(file_name, data, self.formato_combo.currentData(), self.perfil_combo.currentData())
+        if sucesso: QMessageBox.information(self, "Sucesso", f"Certificado salvo em:\n{file_name}")
+        else: QMessageBox.critical(self, "Erro", str(resultado))
     def generate_excel_template(self):
         file_name, _ = QFileDialog.getSaveFileName(self, "Salvar Modelo Excel", "modelo_participantes.xlsx", "Excel Files (*.xlsx)")
         if not file_name: return
+        import pandas as pd  # Carregado só aqui: o pandas pesa na abertura do app.
         df = pd.DataFrame({"Nome da Pessoa": ["Fulano de Tal"], "Tipo de Documento": ["CPF"], "Nº do Documento": ["111.222.333-44"], "Função do Participante": ["Ouvinte"], "Função Customizada (se Outro)": [""]})
         try: df.to_excel(file_name, index=False, engine='openpyxl'); QMessageBox.information(self, "Sucesso", f"Modelo Excel gerado em:\n{file_name}")
         except Exception as e: QMessageBox.critical(self, "Erro", f"Não foi possível salvar o arquivo Excel.\nErro: {e}")
@@ -225,26 +271,47 @@ class MainWindow(QWidget):
         if not all([common_data['tipo_atividade'], common_data['carga_horaria']]) or (self.evento_input.isEnabled() and not common_data['nome_evento']): QMessageBox.warning(self, "Configuração Incompleta", "Preencha os dados do evento na interface."); return
         file_name, _ = QFileDialog.getOpenFileName(self, "Selecionar Arquivo de Lote", "", "Planilhas (*.xlsx *.csv)")
         if not file_name: return
-        output_folder = QFileDialog.getExistingDirectory(self, "Selecionar Pasta para Salvar")
-        if not output_folder: return
+        tipo_saida = self.saida_lote_combo.currentData()
+        if tipo_saida == 'zip': destino, _ = QFileDialog.getSaveFileName(self, "Salvar Arquivo ZIP", "certificados.zip", "ZIP Files (*.zip)")
+        elif tipo_saida == 'pdf': destino, _ = QFileDialog.getSaveFileName(self, "Salvar PDF Único", "certificados.pdf", "PDF Files (*.pdf)")
+        else: destino = QFileDialog.getExistingDirectory(self, "Selecionar Pasta para Salvar")
+        if not destino: return
         try:
-            df = pd.read_excel(file_name) if file_name.lower().endswith('.xlsx') else pd.read_csv(file_name, delimiter=';')
-            df.dropna(how='all', inplace=True)
-            total = len(df); progress = QProgressDialog("Gerando certificados...", "Cancelar", 0, total, self); progress.setWindowModality(Qt.WindowModal)
-            for index, row in df.iterrows():
-                progress.setValue(index)
-                if progress.wasCanceled(): break
-                funcao = row.get("Função do Participante", ""); funcao = row.get("Função Customizada (se Outro)", "") if funcao == "Outro" else funcao
-                person_data = {**common_data, "nome": row.get("Nome da Pessoa"), "doc_tipo": row.get("Tipo de Documento"), "doc_numero": str(row.get("Nº do Documento", "")), "funcao_participante": funcao}
-                doc_str = f"-{person_data['doc_numero']}" if pd.notna(person_data['doc_numero']) and person_data['doc_numero'] != 'nan' else ""
-                output_filename = f"{person_data['nome'].replace(' ', '_')}{doc_str}.pdf"
-                output_path = os.path.join(output_folder, output_filename)
-                sucesso, imagem = gerar_imagem_certificado(**person_data)
-                if sucesso: imagem.convert("RGB").save(output_path)
-            progress.setValue(total); QMessageBox.information(self, "Processo Concluído", f"{total} certificados foram processados.")
-        except Exception as e: QMessageBox.critical(self, "Erro ao Processar Arquivo", f"Ocorreu um erro: {e}")
+            tarefas, erros = montar_tarefas(ler_planilha(file_name), common_data, destino if tipo_saida == 'pasta' else "", self.formato_combo.currentData(), self.perfil_combo.currentData())
+        except Exception as e: QMessageBox.critical(self, "Erro ao Processar Arquivo", f"Ocorreu um erro: {e}"); return
+        if erros and not self.confirm_batch_errors(erros, len(tarefas)): return
+        if not tarefas: QMessageBox.warning(self, "Planilha Vazia", "Nenhum participante válido foi encontrado na planilha."); return
+        total = len(tarefas); self.batch_falhas = []; self.batch_concluidos = 0; self.batch_do_cache = 0
+        self.batch_progress = QProgressDialog("Gerando certificados...", "Cancelar", 0, total, self); self.batch_progress.setWindowModality(Qt.WindowModal); self.batch_progress.setAutoClose(False); self.batch_progress.setAutoReset(False)
+        self.batch_thread = LoteThread(tarefas, criar_saida(tipo_saida, destino), os.path.join(self.app_data_path, 'Cache'), self)
+        self.batch_thread.resultado_pronto.connect(self.on_batch_result); self.batch_thread.falhou.connect(lambda erro: QMessageBox.critical(self, "Erro ao Processar Arquivo", f"Ocorreu um erro: {erro}"))
+        self.batch_thread.finished.connect(self.on_batch_finished); self.batch_progress.canceled.connect(self.batch_thread.requestInterruption)
+        self.batch_gen_button.setEnabled(False); self.batch_thread.start(); self.batch_progress.show()
+    def confirm_batch_errors(self, erros, validas):
+        """Mostra os problemas encontrados na planilha e pergunta se as linhas válidas devem ser geradas."""
+        caixa = QMessageBox(QMessageBox.Warning, "Problemas na Planilha", f"{len(erros)} linhas da planilha têm problemas e não serão geradas:\n\n{resumir_erros(erros)}", parent=self)
+        gerar = caixa.addButton(f"Gerar as {validas} válidas", QMessageBox.AcceptRole) if validas else None
+        salvar = caixa.addButton("Salvar relatório", QMessageBox.ActionRole); caixa.addButton(QMessageBox.Cancel)
+        caixa.exec()
+        if caixa.clickedButton() == salvar:
+            file_name, _ = QFileDialog.getSaveFileName(self, "Salvar Relatório de Erros", "erros_planilha.csv", "CSV Files (*.csv)")
+            if file_name:
+                try: salvar_relatorio_erros(erros, file_name); QMessageBox.information(self, "Sucesso", f"Relatório salvo em:\n{file_name}")
+                except Exception as e: QMessageBox.critical(self, "Erro", f"Não foi possível salvar o relatório.\nErro: {e}")
+        return gerar is not None and caixa.clickedButton() == gerar
+    def on_batch_result(self, resultado):
+        self.batch_concluidos += 1; self.batch_do_cache += bool(resultado.get('cache')); self.batch_progress.setValue(self.batch_concluidos)
+        if not resultado['sucesso']: self.batch_falhas.append(f"{os.path.basename(resultado['caminho'])}: {resultado['erro']}")
+    def on_batch_finished(self):
+        self.batch_progress.close(); self.batch_gen_button.setEnabled(True)
+        mensagem = f"{self.batch_concluidos - len(self.batch_falhas)} certificados foram gerados."
+        if self.batch_do_cache: mensagem += f"\n{self.batch_do_cache} deles não mudaram e foram copiados do cache."
+        if self.batch_thread.isInterruptionRequested(): mensagem += "\nO processo foi cancelado."
+        if self.batch_falhas: mensagem += f"\n{len(self.batch_falhas)} falharam:\n" + "\n".join(self.batch_falhas[:10]) + ("\n..." if len(self.batch_falhas) > 10 else "")
+        QMessageBox.information(self, "Processo Concluído", mensagem)
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
@@ -0,0 +1,170 @@
+# --- benchmarks/benchmark_lote.py (desempenho da geração em lote) ---
+#
+# Gera planilhas sintéticas de participantes, renderiza cada uma com o modelo
+# Modelos/template.png e as fontes Open Sans empacotadas, e mede:
+#   - vazão (certificados por segundo) e tempo total;
+#   - pico de memória (RSS) do processo e dos workers;
+#   - tempo por etapa (modelo, fontes, layout, desenho, conversão RGB, codificação
+#     da imagem no modo imagem, escrita do PDF).
+#
+# Cada tamanho roda em um subprocesso próprio, para que o pico de memória de um
+# não contamine o do outro. O resultado pode ser salvo em JSON e comparado com
+# uma execução anterior para detectar regressões entre versões:
+#
+#   python benchmarks/benchmark_lote.py --json atual.json
+#   python benchmarks/benchmark_lote.py --json nova.json --comparar atual.json
+
+import os
+import sys
+import csv
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import core
+from lote import GeradorEmLote, criar_saida, ler_planilha, montar_tarefas
+
+TAMANHOS_PADRAO = (10, 1000, 10000)
+NOMES = ["Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Heitor", "Isabela", "João", "Larissa", "Mateus"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Santos", "Pereira", "Lima", "Carvalho", "Ferreira", "Rodrigues", "Almeida", "Conceição"]
+FUNCOES = ["Ouvinte", "Ouvinte", "Ouvinte", "Palestrante", "Organizador(a)", "Outro"]
+
+
+def gerar_planilha(caminho, linhas):
+    """Planilha CSV (separada por ';', como a do app) com nomes, documentos e funções variados e determinísticos."""
+    with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+        escritor = csv.writer(arquivo, delimiter=';')
+        escritor.writerow(["Nome da Pessoa", "Tipo de Documento", "Nº do Documento", "Função do Participante", "Função Customizada (se Outro)"])
+        for i in range(linhas):
+            nome = f"{NOMES[i % len(NOMES)]} {SOBRENOMES[(i // len(NOMES)) % len(SOBRENOMES)]} {SOBRENOMES[i % len(SOBRENOMES)]} {i}"
+            doc_tipo = ("CPF", "Matrícula", "Nenhum")[i % 3]
+            doc = f"{i:011d}" if doc_tipo != "Nenhum" else ""
+            funcao = FUNCOES[i % len(FUNCOES)]
+            escritor.writerow([nome, doc_tipo, doc, funcao, "Monitor(a)" if funcao == "Outro" else ""])
+
+
+def pico_memoria_mb():
+    """Pico de RSS deste processo e dos filhos já encerrados, em MB (None onde não há `resource`)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss é em KB no Linux e em bytes no macOS.
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    proprio = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor
+    filhos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor
+    return {'processo': round(proprio, 1), 'maior_worker': round(filhos, 1)}
+
+
+def medir(linhas, args):
+    """Executa um lote de `linhas` certificados e devolve as medições."""
+    pasta = tempfile.mkdtemp(prefix="bench_certificados_")
+    try:
+        planilha = os.path.join(pasta, "participantes.csv")
+        gerar_planilha(planilha, linhas)
+        common_data = {
+            "tipo_atividade": "Palestra", "nome_evento": "Semana de História da UFRRJ", "carga_horaria": "5h",
+            "template_path": os.path.join(BASE_DIR, "Modelos", "template.png"),
+            "font_path_regular": os.path.join(BASE_DIR, "Fontes", "Open_Sans", "OpenSans-Regular.ttf"),
+            "font_path_italic": os.path.join(BASE_DIR, "Fontes", "Open_Sans", "OpenSans-Italic.ttf"),
+            "font_size": 50, "use_italic": True,
+        }
+        destino = os.path.join(pasta, "saida")
+        if args.tipo_saida == 'pasta':
+            os.makedirs(destino)
+        else:
+            destino += "." + args.tipo_saida
+
+        core.limpar_cache()
+        core.ativar_instrumentacao()
+        inicio = time.perf_counter()
+        tarefas, _ = montar_tarefas(ler_planilha(planilha), common_data, destino if args.tipo_saida == 'pasta' else "", args.formato, args.perfil)
+        leitura = time.perf_counter() - inicio
+        gerador = GeradorEmLote(processos=args.processos, saida=criar_saida(args.tipo_saida, destino), instrumentar=True)
+        falhas = sum(1 for resultado in gerador.executar(tarefas) if not resultado['sucesso'])
+        total = time.perf_counter() - inicio
+        return {
+            'linhas': linhas,
+            'falhas': falhas,
+            'tempo_total_s': round(total, 3),
+            'tempo_leitura_s': round(leitura, 3),
+            'certificados_por_s': round(linhas / total, 2) if total else None,
+            'pico_rss_mb': pico_memoria_mb(),
+            'etapas': core.resumo_instrumentacao(),
+            'cache': core.estatisticas_cache(),
+        }
+    finally:
+        core.desativar_instrumentacao()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def comparar(atual, anterior, tolerancia):
+    """Lista os tamanhos em que a vazão caiu mais que `tolerancia` (fração) em relação a `anterior`."""
+    regressoes = []
+    referencia = {r['linhas']: r for r in anterior['resultados']}
+    for resultado in atual['resultados']:
+        antes = referencia.get(resultado['linhas'])
+        if antes and antes['certificados_por_s'] and resultado['certificados_por_s'] < antes['certificados_por_s'] * (1 - tolerancia):
+            regressoes.append(f"{resultado['linhas']} linhas: {antes['certificados_por_s']} -> {resultado['certificados_por_s']} certificados/s")
+    return regressoes
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Mede a vazão, a memória e o tempo por etapa da geração de certificados em lote.")
+    parser.add_argument("--tamanhos", default=",".join(map(str, TAMANHOS_PADRAO)), help="Números de linhas separados por vírgula (padrão: 10,1000,10000).")
+    parser.add_argument("--processos", type=int, default=None, help="Processos de renderização (padrão: um por núcleo).")
+    parser.add_argument("--formato", choices=list(core.MODOS_SAIDA), default="vetorial")
+    parser.add_argument("--perfil", choices=list(core.PERFIS_SAIDA), default="padrao")
+    parser.add_argument("--tipo-saida", choices=["pasta", "zip", "pdf"], default="pasta")
+    parser.add_argument("--json", help="Salva o resultado neste arquivo JSON.")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior; termina com código 1 se houver regressão de vazão.")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="Queda de vazão aceita na comparação (padrão: 0.10 = 10%%).")
+    parser.add_argument("--interno", type=int, help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+
+    if args.interno is not None:
+        # Subprocesso de um único tamanho: imprime o resultado em JSON na saída padrão.
+        print(json.dumps(medir(args.interno, args)))
+        return 0
+
+    repassar = ["--formato", args.formato, "--perfil", args.perfil, "--tipo-saida", args.tipo_saida] + (["--processos", str(args.processos)] if args.processos else [])
+    resultados = []
+    for linhas in (int(t) for t in args.tamanhos.split(",") if t.strip()):
+        saida = subprocess.run([sys.executable, os.path.abspath(__file__), "--interno", str(linhas)] + repassar, check=True, capture_output=True, text=True).stdout
+        resultado = json.loads(saida.strip().splitlines()[-1])
+        resultados.append(resultado)
+        print(f"{linhas:>6} linhas: {resultado['tempo_total_s']:>8.2f} s  {resultado['certificados_por_s']:>8.1f} cert/s  pico RSS {resultado['pico_rss_mb']}")
+        for etapa, medidas in resultado['etapas'].items():
+            print(f"         {etapa:<16} {medidas['chamadas']:>6}x  média {medidas['media_ms']:>8.3f} ms  total {medidas['total_ms']:>10.1f} ms")
+
+    relatorio = {
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(), 'plataforma': platform.platform(), 'cpus': os.cpu_count(),
+        'parametros': {'processos': args.processos, 'formato': args.formato, 'perfil': args.perfil, 'tipo_saida': args.tipo_saida},
+        'resultados': resultados,
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            regressoes = comparar(relatorio, json.load(arquivo), args.tolerancia)
+        for regressao in regressoes:
+            print(f"REGRESSÃO: {regressao}")
+        return 1 if regressoes else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Cache de certificados endereçado por conteúdo.
+
+Cada PDF gerado é guardado com o nome do hash de tudo o que determina o seu
+conteúdo: os campos da pessoa e do evento, o conteúdo (e não o caminho) do modelo
+e das fontes, o tamanho da fonte, o itálico e o formato e o perfil do PDF. Ao refazer um lote,
+as linhas cujas entradas não mudaram são copiadas do cache em vez de renderizadas.
+
+O cache fica em uma pasta própria, com um limite de tamanho: quando ele é
+ultrapassado, os arquivos usados há mais tempo (pela data de modificação, que é
+renovada a cada acerto) são apagados.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import functools
+
+# Mude ao alterar a renderização de um jeito que mude os PDFs gerados, para não reaproveitar os antigos.
+VERSAO_RENDERIZACAO = 2
+LIMITE_PADRAO_MB = 1024
+
+# Campos que vêm de arquivos: entram na chave pelo hash do conteúdo, não pelo caminho.
+CAMPOS_ARQUIVO = ('template_path', 'font_path_regular', 'font_path_italic')
+
+
+@functools.lru_cache(maxsize=256)
+def _hash_arquivo(caminho, tamanho, mtime_ns):
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def hash_arquivo(caminho):
+    """SHA-256 do conteúdo de um arquivo, recalculado só quando o tamanho ou a data de modificação mudam."""
+    caminho = os.path.abspath(caminho)
+    info = os.stat(caminho)
+    return _hash_arquivo(caminho, info.st_size, info.st_mtime_ns)
+
+
+def chave_certificado(dados, modo_saida='vetorial', perfil='padrao'):
+    """Hash de todas as entradas que afetam o PDF de um certificado (veja o início do módulo)."""
+    campos = {chave: valor for chave, valor in dados.items() if chave not in CAMPOS_ARQUIVO}
+    arquivos = {chave: hash_arquivo(dados[chave]) for chave in CAMPOS_ARQUIVO}
+    texto = json.dumps([VERSAO_RENDERIZACAO, campos, arquivos, modo_saida, perfil], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def _remover_temporario(caminho):
+    """Apaga o arquivo temporário de uma gravação que falhou (depois de um os.replace, ele já não existe)."""
+    try:
+        os.remove(caminho)
+    except OSError:
+        pass
+
+
+class CacheRenderizacao:
+    """
+    PDFs guardados em `pasta/<2 primeiros caracteres>/<chave>.pdf`. As gravações passam
+    por um arquivo temporário, então uma interrupção nunca deixa um PDF pela metade no cache.
+    Usado apenas pelo processo que coordena o lote, sem acesso concorrente.
+    """
+    def __init__(self, pasta, limite_bytes=LIMITE_PADRAO_MB * 1024 * 1024):
+        self.pasta = pasta
+        self.limite_bytes = limite_bytes
+        self.acertos = 0
+        self.falhas = 0
+        os.makedirs(pasta, exist_ok=True)
+        self._bytes = sum(tamanho for _, _, tamanho in self._entradas())
+        if self._bytes > self.limite_bytes:
+            self._descartar()  # O limite pode ter sido reduzido desde a última execução.
+
+    def _caminho(self, chave):
+        return os.path.join(self.pasta, chave[:2], chave + ".pdf")
+
+    def _entradas(self):
+        """(caminho, data de modificação, tamanho) de cada PDF guardado."""
+        for sub in os.scandir(self.pasta):
+            if sub.is_dir():
+                for entrada in os.scandir(sub.path):
+                    if entrada.name.endswith(".pdf"):
+                        info = entrada.stat()
+                        yield entrada.path, info.st_mtime_ns, info.st_size
+
+    def _obter(self, chave):
+        caminho = self._caminho(chave)
+        try:
+            os.utime(caminho)  # Marca como usado agora, para o descarte LRU.
+        except OSError:
+            self.falhas += 1
+            return None
+        self.acertos += 1
+        return caminho
+
+    def copiar_para(self, chave, destino):
+        """Copia o PDF guardado para `destino`. Devolve False se a chave não estiver no cache."""
+        caminho = self._obter(chave)
+        if caminho is None:
+            return False
+        temporario = destino + ".tmp"
+        try:
+            shutil.copyfile(caminho, temporario)
+            os.replace(temporario, destino)
+        except FileNotFoundError:
+            return False  # Descartado entre a verificação e a cópia.
+        finally:
+            _remover_temporario(temporario)
+        return True
+
+    def ler(self, chave):
+        """Conteúdo do PDF guardado, ou None se a chave não estiver no cache."""
+        caminho = self._obter(chave)
+        if caminho is None:
+            return None
+        try:
+            with open(caminho, 'rb') as arquivo:
+                return arquivo.read()
+        except FileNotFoundError:
+            return None
+
+    def guardar(self, chave, arquivo=None, conteudo=None):
+        """Guarda um PDF já gerado, a partir de um arquivo em disco ou do seu conteúdo em bytes."""
+        caminho = self._caminho(chave)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = caminho + ".tmp"
+        anterior = os.path.getsize(caminho) if os.path.exists(caminho) else 0
+        try:
+            if arquivo is not None:
+                shutil.copyfile(arquivo, temporario)
+            else:
+                with open(temporario, 'wb') as saida:
+                    saida.write(conteudo)
+            os.replace(temporario, caminho)
+        finally:
+            _remover_temporario(temporario)
+        self._bytes += os.path.getsize(caminho) - anterior
+        if self._bytes > self.limite_bytes:
+            self._descartar()
+
+    def _descartar(self):
+        """Apaga os PDFs usados há mais tempo até o cache ocupar no máximo 90% do limite."""
+        for caminho, _, tamanho in sorted(self._entradas(), key=lambda entrada: entrada[1]):
+            if self._bytes <= self.limite_bytes * 0.9:
+                break
+            try:
+                os.remove(caminho)
+                self._bytes -= tamanho
+            except OSError:
+                pass
+
+    def limpar(self):
+        shutil.rmtree(self.pasta, ignore_errors=True)
+        os.makedirs(self.pasta, exist_ok=True)
+        self._bytes = 0
+
+    def estatisticas(self):
+        return {'acertos': self.acertos, 'falhas': self.falhas, 'bytes': self._bytes}
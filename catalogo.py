@@ -0,0 +1,227 @@
+"""
+Catálogo de fontes e modelos, com índice persistente em disco.
+
+Na inicialização, em vez de listar e abrir cada pasta de fonte, o app lê um
+índice JSON guardado na pasta "Gerador de Certificados". O índice só é refeito
+quando a data de modificação de alguma das pastas catalogadas muda (arquivo
+adicionado, removido ou renomeado); mesmo assim, os metadados de arquivos que
+não mudaram são reaproveitados.
+
+Os estilos de cada fonte vêm das tabelas do próprio arquivo TrueType
+(name, OS/2, head e fvar), e não do nome do arquivo. Assim, famílias com
+negrito, versões condensadas ou fontes variáveis na mesma pasta não trocam o
+regular pelo itálico nem pelo negrito.
+"""
+
+import os
+import json
+import shutil
+import struct
+
+VERSAO_INDICE = 2  # 2: fontes .otf/CFF deixaram de ser catalogadas.
+# Só TrueType: o PDF vetorial embute as fontes como /TrueType (FontFile2), que não serve para contornos CFF.
+EXTENSOES_FONTE = ('.ttf',)
+EXTENSOES_MODELO = ('.png', '.jpg', '.jpeg')
+
+
+def _ler_nomes(dados, deslocamento):
+    """Nomes da tabela 'name' ({nameID: texto}), preferindo os registros Unicode do Windows."""
+    _, quantidade, inicio_textos = struct.unpack_from('>HHH', dados, deslocamento)
+    nomes = {}
+    for i in range(quantidade):
+        plataforma, codificacao, idioma, nome_id, tamanho, posicao = struct.unpack_from('>6H', dados, deslocamento + 6 + i * 12)
+        bruto = dados[deslocamento + inicio_textos + posicao:deslocamento + inicio_textos + posicao + tamanho]
+        if plataforma == 3 and codificacao in (0, 1, 10):
+            # Inglês (EUA) tem prioridade sobre as demais traduções.
+            if nome_id not in nomes or idioma == 0x409:
+                nomes[nome_id] = bruto.decode('utf-16-be', errors='replace')
+        elif plataforma == 1 and codificacao == 0 and nome_id not in nomes:
+            nomes[nome_id] = bruto.decode('mac_roman', errors='replace')
+    return nomes
+
+
+def ler_metadados_fonte(caminho):
+    """
+    Lê família, estilo, peso, largura, itálico e se a fonte é variável direto das
+    tabelas do arquivo. Devolve None se o arquivo não for uma fonte TrueType válida
+    (inclusive um .ttf com contornos CFF, que o PDF vetorial não consegue embutir).
+    """
+    try:
+        with open(caminho, 'rb') as arquivo:
+            dados = arquivo.read()
+        versao, quantidade = struct.unpack_from('>IH', dados, 0)
+        if versao not in (0x00010000, 0x74727565):  # TrueType e 'true'; 'OTTO' (CFF) fica de fora
+            return None
+        tabelas = {}
+        for i in range(quantidade):
+            tag, _, deslocamento, _ = struct.unpack_from('>4sIII', dados, 12 + i * 16)
+            tabelas[tag] = deslocamento
+
+        nomes = _ler_nomes(dados, tabelas[b'name']) if b'name' in tabelas else {}
+        peso, largura, italico = 400, 5, False
+        if b'OS/2' in tabelas:
+            peso, largura = struct.unpack_from('>HH', dados, tabelas[b'OS/2'] + 4)
+            italico = bool(struct.unpack_from('>H', dados, tabelas[b'OS/2'] + 62)[0] & 0x01)
+        elif b'head' in tabelas:
+            estilo_mac = struct.unpack_from('>H', dados, tabelas[b'head'] + 44)[0]
+            peso, italico = (700 if estilo_mac & 0x01 else 400), bool(estilo_mac & 0x02)
+        return {
+            # IDs 16/17 (família/subfamília tipográfica) agrupam melhor que 1/2 quando existem.
+            'familia': nomes.get(16) or nomes.get(1) or os.path.splitext(os.path.basename(caminho))[0],
+            'estilo': nomes.get(17) or nomes.get(2) or "Regular",
+            'peso': peso,
+            'largura': largura,
+            'italico': italico,
+            'variavel': b'fvar' in tabelas,
+        }
+    except (OSError, struct.error, KeyError):
+        return None
+
+
+def _preferencia(caminho, meta):
+    """Ordena candidatos: largura normal, peso mais próximo de 400, fonte estática e caminho mais curto primeiro."""
+    return (meta['largura'] != 5, abs(meta['peso'] - 400), meta['variavel'], caminho.count(os.sep), caminho)
+
+
+def escolher_estilos(arquivos):
+    """
+    Escolhe o regular e o itálico de uma família a partir de {caminho: metadados}.
+    Sem itálico, o regular é usado nos dois estilos. Devolve None se não houver fonte utilizável.
+    """
+    regulares = [(caminho, meta) for caminho, meta in arquivos.items() if meta and not meta['italico']]
+    italicos = [(caminho, meta) for caminho, meta in arquivos.items() if meta and meta['italico']]
+    if not regulares:
+        return None
+    regular = min(regulares, key=lambda item: _preferencia(*item))[0]
+    italico = min(italicos, key=lambda item: _preferencia(*item))[0] if italicos else regular
+    return {'regular': regular, 'italic': italico}
+
+
+def _pastas(raiz):
+    """A pasta e todas as subpastas, que são as datas de modificação observadas pelo índice."""
+    pastas = [raiz]
+    for atual, subpastas, _ in os.walk(raiz):
+        pastas.extend(os.path.join(atual, subpasta) for subpasta in sorted(subpastas))
+    return pastas
+
+
+def _mtime(caminho):
+    try:
+        return os.stat(caminho).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _indice_valido(indice, fontes_dir, modelos_dir):
+    if not indice or indice.get('versao') != VERSAO_INDICE:
+        return False
+    if indice.get('fontes_dir') != os.path.abspath(fontes_dir) or indice.get('modelos_dir') != os.path.abspath(modelos_dir):
+        return False
+    return all(_mtime(pasta) == mtime for pasta, mtime in indice['pastas'].items())
+
+
+def _montar_indice(fontes_dir, modelos_dir, anterior):
+    """Varre as pastas, reaproveitando os metadados de arquivos com mesmo tamanho e data de modificação."""
+    conhecidos = (anterior or {}).get('arquivos', {})
+    pastas, arquivos, fontes = {}, {}, {}
+    for pasta in [modelos_dir] + (_pastas(fontes_dir) if os.path.isdir(fontes_dir) else [fontes_dir]):
+        pastas[os.path.abspath(pasta)] = _mtime(pasta)
+
+    if os.path.isdir(fontes_dir):
+        for familia in sorted(os.listdir(fontes_dir)):
+            pasta_familia = os.path.join(fontes_dir, familia)
+            if not os.path.isdir(pasta_familia):
+                continue
+            da_familia = {}
+            for atual, _, nomes in os.walk(pasta_familia):
+                for nome in nomes:
+                    if not nome.lower().endswith(EXTENSOES_FONTE):
+                        continue
+                    caminho = os.path.abspath(os.path.join(atual, nome))
+                    info = os.stat(caminho)
+                    versao = [info.st_size, info.st_mtime_ns]
+                    registro = conhecidos.get(caminho)
+                    meta = registro['meta'] if registro and registro['versao'] == versao else ler_metadados_fonte(caminho)
+                    arquivos[caminho] = {'versao': versao, 'meta': meta}
+                    da_familia[caminho] = meta
+            estilos = escolher_estilos(da_familia)
+            if estilos:
+                fontes[familia] = estilos
+
+    modelos = sorted(f for f in os.listdir(modelos_dir) if f.lower().endswith(EXTENSOES_MODELO)) if os.path.isdir(modelos_dir) else []
+    return {
+        'versao': VERSAO_INDICE, 'fontes_dir': os.path.abspath(fontes_dir), 'modelos_dir': os.path.abspath(modelos_dir),
+        'pastas': pastas, 'arquivos': arquivos, 'fontes': fontes, 'modelos': modelos,
+    }
+
+
+def carregar_catalogo(fontes_dir, modelos_dir, caminho_indice=None):
+    """
+    Devolve {'fontes': {família: {'regular': caminho, 'italic': caminho}}, 'modelos': [arquivos]}.
+    Com `caminho_indice`, usa e mantém o índice persistente; sem ele, sempre varre as pastas.
+    """
+    anterior = None
+    if caminho_indice and os.path.exists(caminho_indice):
+        try:
+            with open(caminho_indice, encoding='utf-8') as arquivo:
+                anterior = json.load(arquivo)
+        except (OSError, ValueError):
+            anterior = None
+    if _indice_valido(anterior, fontes_dir, modelos_dir):
+        indice = anterior
+    else:
+        indice = _montar_indice(fontes_dir, modelos_dir, anterior)
+        if caminho_indice:
+            try:
+                temporario = caminho_indice + ".tmp"
+                with open(temporario, 'w', encoding='utf-8') as arquivo:
+                    json.dump(indice, arquivo, ensure_ascii=False)
+                os.replace(temporario, caminho_indice)
+            except OSError:
+                pass  # Sem permissão de escrita: o catálogo funciona, só não fica salvo.
+    return {'fontes': indice['fontes'], 'modelos': indice['modelos']}
+
+
+def _itens_empacotados(origem):
+    """Nomes e tamanhos dos itens de uma pasta de recursos empacotada (subpastas sem tamanho)."""
+    if not os.path.isdir(origem):
+        return []
+    return sorted([item, None if os.path.isdir(os.path.join(origem, item)) else os.path.getsize(os.path.join(origem, item))] for item in os.listdir(origem))
+
+
+def copiar_recursos_padrao(origens, caminho_estado):
+    """
+    Copia os recursos empacotados com o app ({pasta de origem: pasta de destino}) para a
+    pasta do usuário, sem sobrescrever arquivos existentes. O estado após a cópia (nomes e
+    tamanhos dos itens empacotados e data de modificação das pastas de destino) fica em
+    `caminho_estado`; enquanto ele não mudar, a verificação item a item é pulada. A pasta de
+    origem não entra no estado: no executável do PyInstaller ela é uma pasta temporária
+    nova a cada execução.
+    """
+    def estado():
+        return {destino: [_itens_empacotados(origem), _mtime(destino)] for origem, destino in origens.items()}
+
+    try:
+        with open(caminho_estado, encoding='utf-8') as arquivo:
+            if json.load(arquivo) == estado():
+                return
+    except (OSError, ValueError):
+        pass
+
+    for origem, destino in origens.items():
+        os.makedirs(destino, exist_ok=True)
+        if not os.path.isdir(origem):
+            continue
+        for item in os.listdir(origem):
+            item_origem, item_destino = os.path.join(origem, item), os.path.join(destino, item)
+            if not os.path.exists(item_destino):
+                if os.path.isdir(item_origem):
+                    shutil.copytree(item_origem, item_destino)
+                else:
+                    shutil.copy2(item_origem, item_destino)
+
+    try:
+        with open(caminho_estado, 'w', encoding='utf-8') as arquivo:
+            json.dump(estado(), arquivo)
+    except OSError:
+        pass
@@ -0,0 +1,124 @@
+# --- cli.py (geração em lote sem interface gráfica) ---
+#
+# Exemplo:
+#   python cli.py participantes.xlsx --saida certificados --atividade Palestra \
+#       --evento "Semana de História" --horas 5 --italico
+#
+# Um manifesto (manifesto.jsonl, na pasta de saída) registra cada certificado gerado.
+# Rodar o mesmo comando de novo retoma o lote: certificados já gerados e com as
+# mesmas entradas são pulados.
+#
+# Com --tipo-saida zip ou pdf, --saida é o arquivo .zip ou .pdf a ser criado; nesses
+# modos o lote é sempre gerado por inteiro.
+#
+# Com --cache, os PDFs gerados ficam guardados em uma pasta de cache; certificados
+# com as mesmas entradas, em qualquer lote posterior (pasta ou zip), são copiados de
+# lá em vez de renderizados.
+
+import os
+import sys
+import argparse
+import multiprocessing
+
+from cache_renderizacao import CacheRenderizacao, LIMITE_PADRAO_MB
+from catalogo import carregar_catalogo
+from core import formatar_carga_horaria, ATIVIDADES_SEM_NOME, MODOS_SAIDA, PERFIS_SAIDA
+from lote import GeradorEmLote, ManifestoLote, SAIDAS_LOTE, criar_saida, hash_entradas, ler_planilha, montar_tarefas, resumir_erros, salvar_relatorio_erros
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Gera certificados em lote a partir de uma planilha, sem abrir a interface gráfica.")
+    parser.add_argument("planilha", help="Planilha de participantes (.xlsx ou .csv separado por ';').")
+    parser.add_argument("--saida", required=True, help="Pasta onde os certificados serão salvos (ou arquivo .zip/.pdf, conforme --tipo-saida).")
+    parser.add_argument("--tipo-saida", choices=list(SAIDAS_LOTE), default="pasta", help="pasta: um PDF por participante (padrão); zip: um arquivo ZIP; pdf: um único PDF com todas as páginas.")
+    parser.add_argument("--atividade", required=True, help="Tipo de atividade (ex.: Palestra, Curso, Oficina).")
+    parser.add_argument("--evento", default="", help="Nome do evento.")
+    parser.add_argument("--horas", required=True, help="Carga horária (ex.: 5 ou 5h).")
+    parser.add_argument("--modelo", default=os.path.join(BASE_DIR, "Modelos", "template.png"), help="Imagem do modelo de certificado.")
+    parser.add_argument("--pasta-fontes", default=os.path.join(BASE_DIR, "Fontes"), help="Pasta com uma subpasta por família de fonte.")
+    parser.add_argument("--fonte", default="Open_Sans", help="Nome da família (subpasta de --pasta-fontes).")
+    parser.add_argument("--tamanho-fonte", type=int, default=50, help="Tamanho da fonte em pontos (padrão: 50).")
+    parser.add_argument("--italico", action="store_true", help="Escreve o nome do evento em itálico.")
+    parser.add_argument("--formato", choices=list(MODOS_SAIDA), default="vetorial", help="vetorial: texto selecionável sobre o modelo (padrão); imagem: página inteira rasterizada.")
+    parser.add_argument("--perfil", choices=list(PERFIS_SAIDA), default="padrao", help="Resolução e compressão: " + "; ".join(f"{nome}: {perfil['descricao']}" for nome, perfil in PERFIS_SAIDA.items()) + ".")
+    parser.add_argument("--processos", type=int, default=None, help="Número de processos de renderização (padrão: um por núcleo).")
+    parser.add_argument("--manifesto", default=None, help="Arquivo do manifesto (padrão: <saida>/manifesto.jsonl).")
+    parser.add_argument("--ignorar-invalidas", action="store_true", help="Gera as linhas válidas mesmo que a planilha tenha linhas com erro.")
+    parser.add_argument("--refazer", action="store_true", help="Ignora o manifesto e gera todos os certificados novamente.")
+    parser.add_argument("--cache", default=None, help="Pasta do cache de certificados já renderizados (padrão: sem cache).")
+    parser.add_argument("--limite-cache", type=int, default=LIMITE_PADRAO_MB, help=f"Tamanho máximo do cache em MB (padrão: {LIMITE_PADRAO_MB}).")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+
+    if args.atividade not in ATIVIDADES_SEM_NOME and not args.evento:
+        print(f"Erro: a atividade '{args.atividade}' exige --evento.", file=sys.stderr); return 2
+    fontes = carregar_catalogo(args.pasta_fontes, os.path.dirname(os.path.abspath(args.modelo)))['fontes']
+    if args.fonte not in fontes:
+        print(f"Erro: fonte '{args.fonte}' não encontrada em {args.pasta_fontes}. Disponíveis: {', '.join(sorted(fontes)) or 'nenhuma'}", file=sys.stderr); return 2
+    if not os.path.isfile(args.modelo):
+        print(f"Erro: modelo não encontrado: {args.modelo}", file=sys.stderr); return 2
+
+    common_data = {
+        "tipo_atividade": args.atividade, "nome_evento": args.evento if args.atividade not in ATIVIDADES_SEM_NOME else "",
+        "carga_horaria": formatar_carga_horaria(args.horas), "template_path": args.modelo,
+        "font_path_regular": fontes[args.fonte]['regular'], "font_path_italic": fontes[args.fonte]['italic'],
+        "font_size": args.tamanho_fonte, "use_italic": args.italico,
+    }
+    if args.tipo_saida == 'pasta':
+        os.makedirs(args.saida, exist_ok=True)
+        pasta_relatorio = pasta_tarefas = args.saida
+    else:
+        pasta_relatorio, pasta_tarefas = os.path.dirname(os.path.abspath(args.saida)), ""
+        os.makedirs(pasta_relatorio, exist_ok=True)
+    try:
+        tarefas, erros = montar_tarefas(ler_planilha(args.planilha), common_data, pasta_tarefas, args.formato, args.perfil)
+    except Exception as e:  # Arquivo inexistente, corrompido, em outra codificação etc.
+        print(f"Erro ao ler a planilha {args.planilha}: {e}", file=sys.stderr); return 2
+    manifesto = ManifestoLote(args.manifesto or os.path.join(args.saida, "manifesto.jsonl")) if args.tipo_saida == 'pasta' else None
+
+    if erros:
+        relatorio = os.path.join(pasta_relatorio, "erros_planilha.csv")
+        salvar_relatorio_erros(erros, relatorio)
+        print(f"{len(erros)} linhas com problemas (relatório completo em {relatorio}):\n{resumir_erros(erros)}", file=sys.stderr)
+        if not args.ignorar_invalidas or not tarefas:
+            print("Nada foi gerado. Corrija a planilha" + (" ou use --ignorar-invalidas para gerar só as linhas válidas." if tarefas else "."), file=sys.stderr); return 2
+
+    pendentes, hashes = [], {}
+    for tarefa in tarefas:
+        if manifesto is None:
+            pendentes.append(tarefa); continue
+        hashes[tarefa['indice']] = hash_entradas(tarefa['dados'], tarefa['modo_saida'], tarefa['perfil'])
+        if args.refazer or not manifesto.concluida(tarefa['caminho_saida'], hashes[tarefa['indice']]):
+            pendentes.append(tarefa)
+    puladas = len(tarefas) - len(pendentes)
+    print(f"{len(tarefas)} linhas válidas na planilha; {puladas} já concluídas, {len(pendentes)} a gerar.")
+
+    linhas_planilha = {tarefa['indice']: tarefa['linha'] for tarefa in pendentes}
+    falhas = do_cache = 0
+    cache = CacheRenderizacao(args.cache, args.limite_cache * 1024 * 1024) if args.cache else None
+    gerador = GeradorEmLote(processos=args.processos, saida=criar_saida(args.tipo_saida, args.saida), cache=cache)
+    try:
+        for feitos, resultado in enumerate(gerador.executar(pendentes), start=1):
+            if manifesto: manifesto.registrar(resultado, hashes[resultado['indice']], linhas_planilha[resultado['indice']])
+            do_cache += bool(resultado.get('cache'))
+            if not resultado['sucesso']:
+                falhas += 1
+                print(f"[falha] linha {linhas_planilha[resultado['indice']]}: {resultado['erro']}", file=sys.stderr)
+            print(f"\r{feitos}/{len(pendentes)}", end="", flush=True)
+    except KeyboardInterrupt:
+        print("\nInterrompido. Rode o mesmo comando para continuar de onde parou.", file=sys.stderr); return 130
+    finally:
+        if manifesto: manifesto.fechar()
+
+    print(f"\n{len(pendentes) - falhas} gerados ({do_cache} do cache), {falhas} com falha, {puladas} pulados.")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,91 +1,482 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
 from PIL import Image, ImageDraw, ImageFont
 
+
+class CacheLRU:
+    """
+    Cache em memória com descarte LRU (o item usado há mais tempo sai primeiro),
+    limitado por número de itens e por uma estimativa de bytes ocupados.
+    Mantém contadores de acertos e falhas para diagnóstico.
+    """
+    def __init__(self, limite_bytes, limite_itens=None):
+        self.limite_bytes = limite_bytes
+        self.limite_itens = limite_itens
+        self.acertos = 0
+        self.falhas = 0
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def obter(self, chave, carregar):
+        """
+        Devolve o valor associado a `chave`. Em caso de falha, chama
+        `carregar()`, que deve devolver uma tupla (valor, tamanho_em_bytes).
+        """
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave][0]
+            self.falhas += 1
+
+        # Carrega fora do lock para não serializar leituras de disco independentes.
+        valor, tamanho = carregar()
+
+        with self._lock:
+            if chave not in self._itens:
+                self._itens[chave] = (valor, tamanho)
+                self._bytes += tamanho
+                self._descartar_excedente()
+            return self._itens[chave][0] if chave in self._itens else valor
+
+    def _descartar_excedente(self):
+        # Nunca descarta o item mais recente, mesmo que ele sozinho ultrapasse o limite.
+        while len(self._itens) > 1 and (self._bytes > self.limite_bytes or (self.limite_itens and len(self._itens) > self.limite_itens)):
+            _, (_, tamanho) = self._itens.popitem(last=False)
+            self._bytes -= tamanho
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+            self.acertos = 0
+            self.falhas = 0
+
+    def estatisticas(self):
+        with self._lock:
+            return {'acertos': self.acertos, 'falhas': self.falhas, 'itens': len(self._itens), 'bytes': self._bytes}
+
+
+# Modelos decodificados ocupam largura * altura * bandas; 256 MB comportam dezenas de modelos A4 a 150 dpi.
+_cache_modelos = CacheLRU(limite_bytes=256 * 1024 * 1024, limite_itens=16)
+_cache_fontes = CacheLRU(limite_bytes=64 * 1024 * 1024, limite_itens=64)
+
+
+def assinatura_arquivo(caminho):
+    """Identifica a versão de um arquivo em disco pelo caminho absoluto e data de modificação."""
+    caminho = os.path.abspath(caminho)
+    return caminho, os.stat(caminho).st_mtime_ns
+
+
+def carregar_modelo(template_path, escala=1.0):
+    """
+    Devolve o modelo decodificado, vindo do cache quando possível, opcionalmente
+    redimensionado por `escala` (a versão reduzida também fica no cache).
+    A imagem devolvida é compartilhada e NÃO deve ser alterada; use `.copy()` antes de desenhar.
+    """
+    def carregar():
+        if escala != 1.0:
+            original = carregar_modelo(template_path)
+            tamanho = (max(1, round(original.width * escala)), max(1, round(original.height * escala)))
+            modelo = original.resize(tamanho, Image.LANCZOS, reducing_gap=3.0)
+        else:
+            with Image.open(template_path) as imagem:
+                imagem.load()
+                modelo = imagem.copy()
+        return modelo, modelo.width * modelo.height * len(modelo.getbands())
+    return _cache_modelos.obter((assinatura_arquivo(template_path), escala), carregar)
+
+
+def carregar_fonte(font_path, font_size):
+    """Devolve um `FreeTypeFont` já carregado para o caminho e tamanho pedidos, vindo do cache quando possível."""
+    caminho, mtime = assinatura_arquivo(font_path)
+    def carregar():
+        return ImageFont.truetype(caminho, size=font_size), os.path.getsize(caminho)
+    return _cache_fontes.obter((caminho, mtime, font_size), carregar)
+
+
+def tamanho_modelo(template_path):
+    """Largura e altura do modelo em pixels, lidas do cabeçalho sem decodificar a imagem."""
+    with Image.open(template_path) as imagem:
+        return imagem.size
+
+
+def estatisticas_cache():
+    """Contadores de acertos/falhas e ocupação dos caches de modelos e fontes."""
+    return {'modelos': _cache_modelos.estatisticas(), 'fontes': _cache_fontes.estatisticas()}
+
+
+def limpar_cache():
+    _cache_modelos.limpar()
+    _cache_fontes.limpar()
+
+
+# --- Instrumentação opcional: tempo gasto em cada etapa da geração ---
+# Desligada por padrão; enquanto desligada, `medir_etapa` não mede nada.
+# Cada trecho de trabalho é medido em uma única etapa: 'codificar_imagem' é a compressão
+# da página rasterizada (modo imagem) e 'codificar_pdf', a escrita do PDF.
+ETAPAS = ('carregar_modelo', 'carregar_fonte', 'layout', 'desenhar', 'converter_rgb', 'codificar_imagem', 'codificar_pdf')
+_tempos_etapas = None
+_lock_tempos = threading.Lock()
+
+
+def ativar_instrumentacao():
+    """Começa a registrar a duração de cada etapa (descarta medições anteriores)."""
+    global _tempos_etapas
+    with _lock_tempos:
+        _tempos_etapas = {etapa: [] for etapa in ETAPAS}
+
+
+def desativar_instrumentacao():
+    global _tempos_etapas
+    with _lock_tempos:
+        _tempos_etapas = None
+
+
+def instrumentacao_ativa():
+    return _tempos_etapas is not None
+
+
+@contextmanager
+def medir_etapa(etapa):
+    """Mede a duração do bloco e a registra em `etapa`, se a instrumentação estiver ativa."""
+    if _tempos_etapas is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        with _lock_tempos:
+            if _tempos_etapas is not None:
+                _tempos_etapas.setdefault(etapa, []).append(duracao)
+
+
+def coletar_tempos():
+    """Devolve as durações registradas até aqui ({etapa: [segundos, ...]}) e zera o registro."""
+    global _tempos_etapas
+    with _lock_tempos:
+        if _tempos_etapas is None:
+            return {}
+        tempos, _tempos_etapas = _tempos_etapas, {etapa: [] for etapa in ETAPAS}
+        return tempos
+
+
+def acrescentar_tempos(tempos):
+    """Junta ao registro local durações medidas em outro processo (ex.: um worker do lote)."""
+    with _lock_tempos:
+        if _tempos_etapas is not None:
+            for etapa, duracoes in tempos.items():
+                _tempos_etapas.setdefault(etapa, []).extend(duracoes)
+
+
+def resumo_instrumentacao(tempos=None):
+    """Resumo por etapa: número de chamadas, tempo total, média e máximo (em milissegundos)."""
+    if tempos is None:
+        with _lock_tempos:
+            tempos = {etapa: list(duracoes) for etapa, duracoes in (_tempos_etapas or {}).items()}
+    return {
+        etapa: {
+            'chamadas': len(duracoes),
+            'total_ms': round(sum(duracoes) * 1000, 3),
+            'media_ms': round(sum(duracoes) * 1000 / len(duracoes), 3),
+            'max_ms': round(max(duracoes) * 1000, 3),
+        }
+        for etapa, duracoes in tempos.items() if duracoes
+    }
+
+
+# Atividades que não têm um nome de evento associado.
+ATIVIDADES_SEM_NOME = ["Disciplina não curricular", "Bolsa de Iniciação Científica"]
+
+# Tamanhos de fonte aceitos, em pontos (os mesmos da interface).
+TAMANHO_FONTE_MINIMO, TAMANHO_FONTE_MAXIMO = 10, 200
+
+
+def formatar_carga_horaria(horas):
+    """Acrescenta o sufixo 'h' à carga horária digitada, quando ele ainda não estiver presente."""
+    return f"{horas}h" if horas and not horas.endswith('h') else (horas or "[Horas]")
+
+
+class LayoutTexto:
+    """
+    Resultado do layout de um bloco de texto: uma lista de linhas, cada uma uma lista
+    de palavras no formato {'text', 'style', 'font', 'width', 'x', 'y'}, com (x, y)
+    no canto superior esquerdo. É consumido pelo desenho (imagem) e pelo PDF vetorial.
+    """
+    def __init__(self, lines):
+        self.lines = lines
+
+    def desenhar(self, draw, fill="black"):
+        for line in self.lines:
+            for word_info in line:
+                draw.text((word_info['x'], word_info['y']), word_info['text'], font=word_info['font'], fill=fill)
+
+    def escalar(self, escala, fonts, image_width):
+        """
+        Adapta o layout, calculado em tamanho real, para uma imagem reduzida por `escala`,
+        usando as fontes de `fonts` (mesmos estilos, tamanho já escalado).
+        As quebras de linha são preservadas, então o texto fica igual em qualquer resolução;
+        só o espaçamento dentro de cada linha é remedido, porque a fonte pequena não
+        encolhe exatamente na mesma proporção.
+        """
+        space_width = fonts['regular'].getlength(' ')
+        scaled_lines = []
+        for line in self.lines:
+            words = [{**word_info, 'font': fonts[word_info['style']], 'width': fonts[word_info['style']].getlength(word_info['text']), 'y': word_info['y'] * escala} for word_info in line]
+            x = (image_width - sum(word['width'] for word in words) - (len(words) - 1) * space_width) / 2
+            for word_info in words:
+                word_info['x'] = x
+                x += word_info['width'] + space_width
+            scaled_lines.append(words)
+        return LayoutTexto(scaled_lines)
+
+
+class MotorDeLayout:
+    """
+    Layout de blocos de texto reaproveitável entre certificados com as mesmas fontes,
+    posição e largura (um lote, ou a pré-visualização enquanto o usuário digita).
+
+    - A largura de cada palavra é medida uma única vez por estilo.
+    - As linhas que começam em um mesmo trecho final do texto são iguais para todas
+      as pessoas, porque a quebra depende só das palavras seguintes. Elas são guardadas
+      pelo trecho a partir do qual começam; depois da primeira pessoa do lote, só as
+      linhas afetadas pelos campos individuais (nome, documento, função) são refeitas.
+    """
+    LIMITE_MEMO = 4096
+
+    def __init__(self, fonts, pos, max_width, image_width):
+        self.fonts = fonts
+        self.pos = pos
+        self.max_width = max_width
+        self.image_width = image_width
+        self.space_width = fonts['regular'].getlength(' ')
+        self.line_height = fonts['regular'].getbbox('A')[3] * 1.5
+        self._larguras = {}
+        self._continuacoes = {}
+
+    def _medir(self, text_segments):
+        words = []
+        for text, style in text_segments:
+            if style not in self.fonts: style = 'regular' # Usa regular se o estilo não for encontrado
+            for word in text.split():
+                chave = (style, word)
+                width = self._larguras.get(chave)
+                if width is None:
+                    if len(self._larguras) >= self.LIMITE_MEMO: self._larguras.clear()
+                    width = self._larguras[chave] = self.fonts[style].getlength(word)
+                words.append((word, style, width))
+        return words
+
+    def _centralizar(self, line):
+        line_width = sum(word[2] for word in line) + (len(line) - 1) * self.space_width
+        x = (self.image_width - line_width) / 2
+        placed = []
+        for word, style, width in line:
+            placed.append((word, style, width, x))
+            x += width + self.space_width
+        return tuple(placed)
+
+    def _continuacao(self, words):
+        """Linhas (já centralizadas) de um trecho de texto que começa no início de uma linha."""
+        lines = self._continuacoes.get(words)
+        if lines is not None:
+            return lines
+        current_line = [words[0]]
+        current_width = words[0][2]
+        lines = None
+        for posicao in range(1, len(words)):
+            word = words[posicao]
+            if (current_width + self.space_width + word[2]) <= self.max_width:
+                current_line.append(word)
+                current_width += word[2] + self.space_width
+            else:
+                lines = (self._centralizar(current_line),) + self._continuacao(words[posicao:])
+                break
+        if lines is None:
+            lines = (self._centralizar(current_line),)
+        if len(self._continuacoes) >= self.LIMITE_MEMO: self._continuacoes.clear()
+        self._continuacoes[words] = lines
+        return lines
+
+    def diagramar(self, text_segments):
+        """Calcula o `LayoutTexto` centralizado, com quebra de linha automática, de uma lista de (texto, estilo)."""
+        words = self._medir(text_segments)
+        lines = []
+        current_line = []
+        current_width = 0
+        for posicao, word in enumerate(words):
+            if not current_line or (current_width + self.space_width + word[2]) <= self.max_width:
+                current_line.append(word)
+                current_width += word[2] + (self.space_width if current_line else 0)
+            else:
+                lines.append(self._centralizar(current_line))
+                lines.extend(self._continuacao(tuple(words[posicao:])))
+                current_line = []
+                break
+        if current_line:
+            lines.append(self._centralizar(current_line))
+
+        y = self.pos[1]
+        layout = []
+        for line in lines:
+            layout.append([{'text': word, 'style': style, 'font': self.fonts[style], 'width': width, 'x': x, 'y': y} for word, style, width, x in line])
+            y += self.line_height
+        return LayoutTexto(layout)
+
+
+_motores_layout = CacheLRU(limite_bytes=float('inf'), limite_itens=8)
+
+def obter_motor_layout(fonts, pos, max_width, image_width):
+    """Motor de layout compartilhado para estas fontes (objetos do cache), posição e largura."""
+    chave = (id(fonts['regular']), id(fonts['italic']), tuple(pos), max_width, image_width)
+    # O motor guarda referências às fontes, então os ids da chave não são reaproveitados enquanto ele existir.
+    return _motores_layout.obter(chave, lambda: (MotorDeLayout(fonts, pos, max_width, image_width), 0))
+
+def layout_mixed_style_text(pos, text_segments, fonts, max_width, image_width):
+    """
+    Calcula a posição de cada palavra de um bloco de texto centralizado com múltiplos
+    estilos e quebra de linha automática, sem desenhar nada. Devolve um `LayoutTexto`.
+    """
+    return obter_motor_layout(fonts, pos, max_width, image_width).diagramar(text_segments)
+
 def draw_mixed_style_text(draw, pos, text_segments, fonts, max_width):
     """
     Desenha um bloco de texto centralizado com múltiplos estilos (regular, itálico)
     e com quebra de linha automática.
     """
-    space_width = draw.textlength(' ', font=fonts['regular'])
-    
-    words_with_style = []
-    for text, style in text_segments:
-        font = fonts.get(style, fonts['regular']) # Usa regular se o estilo não for encontrado
-        for word in text.split():
-            words_with_style.append({'text': word, 'font': font, 'width': draw.textlength(word, font=font)})
-
-    lines = []
-    current_line = []
-    current_width = 0
-    for word_info in words_with_style:
-        if not current_line or (current_width + space_width + word_info['width']) <= max_width:
-            current_line.append(word_info)
-            current_width += word_info['width'] + (space_width if current_line else 0)
-        else:
-            lines.append(current_line)
-            current_line = [word_info]
-            current_width = word_info['width']
-    if current_line:
-        lines.append(current_line)
-
-    y = pos[1]
-    line_height = fonts['regular'].getbbox('A')[3] * 1.5
-    
-    for line in lines:
-        line_width = sum(word['width'] for word in line) + (len(line) - 1) * space_width
-        x = (draw.im.size[0] - line_width) / 2
-        
-        for word_info in line:
-            draw.text((x, y), word_info['text'], font=word_info['font'], fill="black")
-            x += word_info['width'] + space_width
-        y += line_height
-
-def gerar_certificado(nome, funcao_participante, tipo_atividade, nome_evento, carga_horaria, template_path, doc_tipo, doc_numero, font_path_regular, font_path_italic, font_size, use_italic):
+    layout_mixed_style_text(pos, text_segments, fonts, max_width, draw.im.size[0]).desenhar(draw)
+
+def montar_texto_certificado(nome, funcao_participante, tipo_atividade, nome_evento, carga_horaria, doc_tipo, doc_numero, use_italic):
     """
-    Gera um objeto de imagem de certificado, aplicando itálico opcionalmente.
+    Monta os segmentos de texto do certificado como uma lista de (texto, estilo).
+    """
+    nome = (nome if nome else "[Nome da Pessoa]").upper()
+    funcao_participante = funcao_participante.lower() if funcao_participante else "[Função]"
+    tipo_atividade = tipo_atividade if tipo_atividade else "[Tipo de Atividade]"
+    carga_horaria = carga_horaria if carga_horaria else "[Horas]"
+
+    texto_documento = ""
+    if doc_tipo == "CPF" and doc_numero:
+        texto_documento = f", portador(a) do CPF {doc_numero},"
+    elif doc_tipo == "Matrícula" and doc_numero:
+        texto_documento = f", portador(a) da matrícula nº {doc_numero},"
+    else:
+        texto_documento = ","
+
+    # --- LÓGICA DE TEXTO COM ITÁLICO OPCIONAL ---
+    texto_inicial = f"Certificamos que {nome}{texto_documento} participou como {funcao_participante} da atividade de {tipo_atividade.lower()} "
+    texto_evento = f'"{nome_evento}"' if nome_evento else ""
+    texto_final = f" com carga horária de {carga_horaria}."
+
+    # Define o estilo do evento com base na checkbox
+    estilo_evento = 'italic' if use_italic and nome_evento else 'regular'
+
+    return [
+        (texto_inicial, 'regular'),
+        (texto_evento, estilo_evento),
+        (texto_final, 'regular')
+    ]
+
+POSICAO_BLOCO = (250, 600)
+LARGURA_MAXIMA = 1500
+
+def montar_certificado(nome, funcao_participante, tipo_atividade, nome_evento, carga_horaria, template_path, doc_tipo, doc_numero, font_path_regular, font_path_italic, font_size, use_italic, escala=1.0):
+    """
+    Calcula o certificado sem rasterizar o texto: devolve o modelo (compartilhado,
+    não deve ser alterado) e a posição de cada palavra, para quem for desenhá-lo
+    (a imagem do `gerar_certificado` ou o PDF vetorial).
+
+    Com `escala` diferente de 1, o modelo, as posições e a fonte são reduzidos na
+    mesma proporção; o layout continua sendo calculado no tamanho real.
     """
     try:
-        template = Image.open(template_path)
-        draw = ImageDraw.Draw(template)
-
-        nome = (nome if nome else "[Nome da Pessoa]").upper()
-        funcao_participante = funcao_participante.lower() if funcao_participante else "[Função]"
-        tipo_atividade = tipo_atividade if tipo_atividade else "[Tipo de Atividade]"
-        carga_horaria = carga_horaria if carga_horaria else "[Horas]"
-
-        texto_documento = ""
-        if doc_tipo == "CPF" and doc_numero:
-            texto_documento = f", portador(a) do CPF {doc_numero},"
-        elif doc_tipo == "Matrícula" and doc_numero:
-            texto_documento = f", portador(a) da matrícula nº {doc_numero},"
-        else:
-            texto_documento = ","
-
-        # --- LÓGICA DE TEXTO COM ITÁLICO OPCIONAL ---
-        texto_inicial = f"Certificamos que {nome}{texto_documento} participou como {funcao_participante} da atividade de {tipo_atividade.lower()} "
-        texto_evento = f'"{nome_evento}"' if nome_evento else ""
-        texto_final = f" com carga horária de {carga_horaria}."
-        
-        # Define o estilo do evento com base na checkbox
-        estilo_evento = 'italic' if use_italic and nome_evento else 'regular'
-        
-        text_segments = [
-            (texto_inicial, 'regular'),
-            (texto_evento, estilo_evento),
-            (texto_final, 'regular')
-        ]
-
-        fonts = {
-            'regular': ImageFont.truetype(font_path_regular, size=font_size),
-            'italic': ImageFont.truetype(font_path_italic, size=font_size)
+        with medir_etapa('carregar_modelo'):
+            original = carregar_modelo(template_path)
+            template = carregar_modelo(template_path, escala) if escala != 1.0 else original
+        text_segments = montar_texto_certificado(nome, funcao_participante, tipo_atividade, nome_evento, carga_horaria, doc_tipo, doc_numero, use_italic)
+        with medir_etapa('carregar_fonte'):
+            fonts = {
+                'regular': carregar_fonte(font_path_regular, font_size),
+                'italic': carregar_fonte(font_path_italic, font_size)
+            }
+            if escala != 1.0:
+                tamanho_escalado = font_size * escala  # Tamanho fracionário (Pillow 10.1+): a largura do texto acompanha a escala.
+                fonts_escaladas = {
+                    'regular': carregar_fonte(font_path_regular, tamanho_escalado),
+                    'italic': carregar_fonte(font_path_italic, tamanho_escalado)
+                }
+        with medir_etapa('layout'):
+            layout = layout_mixed_style_text(POSICAO_BLOCO, text_segments, fonts, LARGURA_MAXIMA, original.width)
+            if escala != 1.0:
+                fonts = fonts_escaladas
+                layout = layout.escalar(escala, fonts, template.width)
+        return True, {
+            'template': template, 'template_path': template_path, 'tamanho': original.size, 'escala': escala,
+            'font_size': font_size, 'font_paths': {'regular': font_path_regular, 'italic': font_path_italic},
+            'fonts': fonts, 'layout': layout,
         }
-        
-        posicao_bloco = (250, 600)
-        largura_maxima = 1500
-        
-        draw_mixed_style_text(draw, posicao_bloco, text_segments, fonts, largura_maxima)
-        
+
+    except Exception as e:
+        msg_erro = f"Ocorreu um erro no core:\n{e}"
+        return False, msg_erro
+
+def gerar_certificado(nome, funcao_participante, tipo_atividade, nome_evento, carga_horaria, template_path, doc_tipo, doc_numero, font_path_regular, font_path_italic, font_size, use_italic, escala=1.0):
+    """
+    Gera um objeto de imagem de certificado, aplicando itálico opcionalmente.
+    Com `escala` menor que 1 (ex.: pré-visualização), desenha direto na resolução reduzida.
+    """
+    sucesso, certificado = montar_certificado(nome, funcao_participante, tipo_atividade, nome_evento, carga_horaria, template_path, doc_tipo, doc_numero, font_path_regular, font_path_italic, font_size, use_italic, escala)
+    if not sucesso:
+        return False, certificado
+    try:
+        with medir_etapa('desenhar'):
+            template = certificado['template'].copy()
+            draw = ImageDraw.Draw(template)
+            certificado['layout'].desenhar(draw)
         return True, template
 
     except Exception as e:
         msg_erro = f"Ocorreu um erro no core:\n{e}"
-        return False, msg_erro
\ No newline at end of file
+        return False, msg_erro
+
+# Formatos de PDF disponíveis para salvar certificados.
+MODOS_SAIDA = {
+    'vetorial': "PDF com texto selecionável",
+    'imagem': "PDF em imagem",
+}
+
+# Perfis de codificação do PDF. `escala` é a resolução da imagem (do fundo, no modo vetorial,
+# ou da página inteira, no modo imagem) em relação ao modelo; o tamanho da página não muda.
+# `qualidade` é a do JPEG (None: sem perdas) e `alvo_bytes`, o tamanho máximo do arquivo,
+# buscado reduzindo a qualidade e, se preciso, a resolução.
+PERFIS_SAIDA = {
+    'padrao': {'descricao': "Padrão", 'escala': 1.0, 'qualidade': 75, 'alvo_bytes': None},
+    'impressao': {'descricao': "Impressão (resolução total, sem perdas)", 'escala': 1.0, 'qualidade': None, 'alvo_bytes': None},
+    'email': {'descricao': "E-mail (até 300 KB)", 'escala': 0.5, 'qualidade': 85, 'alvo_bytes': 300 * 1024},
+    'rascunho': {'descricao': "Rascunho (baixa resolução)", 'escala': 0.25, 'qualidade': 60, 'alvo_bytes': None},
+}
+
+def salvar_certificado(destino, dados, modo='vetorial', perfil='padrao'):
+    """
+    Gera o certificado descrito por `dados` (os argumentos de `gerar_certificado`) e o
+    salva como PDF em `destino` (caminho ou arquivo binário aberto para escrita).
+    No modo 'vetorial' o modelo entra como imagem de fundo e o texto como texto PDF;
+    no modo 'imagem' a página inteira é rasterizada. `perfil` é uma das chaves de `PERFIS_SAIDA`.
+    """
+    import pdf_vetorial
+    sucesso, pagina = pdf_vetorial.montar_pagina(dados, modo, perfil)
+    if not sucesso:
+        return False, pagina
+    try:
+        with medir_etapa('codificar_pdf'):
+            pdf_vetorial.salvar_pdf(destino, pagina)
+        return True, destino
+    except Exception as e:
+        return False, f"Ocorreu um erro no core:\n{e}"
@@ -0,0 +1,491 @@
+import io
+import os
+import json
+import time
+import zipfile
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import core
+from cache_renderizacao import chave_certificado
+
+COLUNAS_PLANILHA = ["Nome da Pessoa", "Tipo de Documento", "Nº do Documento", "Função do Participante", "Função Customizada (se Outro)"]
+
+
+# Colunas sem as quais nenhuma linha pode ser gerada; as demais podem faltar.
+COLUNAS_OBRIGATORIAS = ("Nome da Pessoa", "Função do Participante")
+TIPOS_DOCUMENTO = ("Nenhum", "CPF", "Matrícula")
+TAMANHO_BLOCO = 5000
+
+# Caracteres que o Windows não aceita em nomes de arquivo.
+CARACTERES_INVALIDOS_ARQUIVO = r'[\\/:*?"<>|]'
+
+
+def ler_planilha(file_name, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Lê a planilha de participantes (.xlsx ou .csv separado por ';') em blocos de até
+    `tamanho_bloco` linhas, sem carregá-la inteira na memória. Cada bloco é um DataFrame
+    de textos cujo índice é o número da linha na planilha (o cabeçalho é a linha 1).
+    Sempre há ao menos um bloco, mesmo sem linhas de dados, para que o cabeçalho seja
+    conferido; uma planilha sem cabeçalho vira um bloco sem colunas.
+    """
+    import pandas as pd
+    if file_name.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+        planilha = load_workbook(file_name, read_only=True, data_only=True)
+        try:
+            linhas = planilha.active.iter_rows(values_only=True)
+            cabecalho = next(linhas, None)
+            if cabecalho is None:
+                yield pd.DataFrame(dtype=object)
+                return
+            colunas = [str(coluna) if coluna is not None else "" for coluna in cabecalho]
+            bloco, inicio = [], 2
+            for valores in linhas:
+                bloco.append(valores[:len(colunas)] + (None,) * (len(colunas) - len(valores)))
+                if len(bloco) == tamanho_bloco:
+                    yield pd.DataFrame(bloco, columns=colunas, index=range(inicio, inicio + len(bloco)), dtype=object)
+                    inicio += len(bloco); bloco = []
+            if bloco or inicio == 2:
+                yield pd.DataFrame(bloco, columns=colunas, index=range(inicio, inicio + len(bloco)), dtype=object)
+        finally:
+            planilha.close()
+    else:
+        try:
+            leitor = pd.read_csv(file_name, delimiter=';', dtype=str, keep_default_na=False, skip_blank_lines=False, encoding='utf-8-sig', chunksize=tamanho_bloco)
+        except pd.errors.EmptyDataError:
+            yield pd.DataFrame(dtype=object)  # Arquivo vazio: nem o cabeçalho existe.
+            return
+        for bloco in leitor:
+            bloco.index = bloco.index + 2
+            yield bloco
+
+
+def _normalizar_bloco(bloco):
+    """
+    Padroniza um bloco lido da planilha, coluna a coluna: nomes de coluna sem espaços
+    sobrando e sem repetição, colunas ausentes vazias, células como texto sem espaços nas pontas, números
+    inteiros vindos do Excel sem o '.0' e linhas totalmente vazias descartadas.
+    """
+    bloco = bloco.rename(columns=lambda coluna: str(coluna).strip())
+    # Cabeçalhos repetidos (ex.: várias células em branco ou duas colunas "Obs"): vale a primeira.
+    bloco = bloco.loc[:, ~bloco.columns.duplicated()]
+    bloco = bloco.reindex(columns=COLUNAS_PLANILHA)
+    bloco = bloco.astype(object).where(bloco.notna(), "")
+    bloco = bloco.apply(lambda coluna: coluna.astype(str).str.strip())
+    bloco = bloco.replace({"nan": "", "None": "", "NaN": ""})
+    bloco["Nº do Documento"] = bloco["Nº do Documento"].str.replace(r"\.0$", "", regex=True)
+    return bloco[(bloco != "").any(axis=1)]
+
+
+def montar_tarefas(blocos, common_data, output_folder, modo_saida='vetorial', perfil='padrao'):
+    """
+    Valida a planilha inteira antes de qualquer renderização e converte cada linha válida
+    em uma tarefa independente (dados completos do certificado + caminho de saída), pronta
+    para ser enviada a um processo. `blocos` vem de `ler_planilha`; `modo_saida` é uma das
+    chaves de `core.MODOS_SAIDA` e `perfil`, uma das de `core.PERFIS_SAIDA`.
+
+    A validação é feita por coluna em cada bloco: resolve as funções "Outro" pela coluna
+    de função customizada e aponta nomes ou funções vazios, tipos de documento desconhecidos,
+    documentos faltando e nomes de arquivo de saída repetidos (que sobrescreveriam outro
+    certificado). Devolve (tarefas, erros); cada erro é um dicionário {'linha', 'nome', 'erro'}.
+    Se faltar uma das `COLUNAS_OBRIGATORIAS` no cabeçalho, devolve só o erro da coluna ausente.
+    """
+    import pandas as pd
+    tarefas, erros = [], []
+    arquivos_vistos = {}
+    for numero, bloco in enumerate(blocos):
+        if numero == 0:
+            colunas = {str(coluna).strip() for coluna in bloco.columns}
+            ausentes = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in colunas]
+            if ausentes:
+                return [], [{'linha': 1, 'nome': "", 'erro': f"Coluna ausente no cabeçalho: '{coluna}'."} for coluna in ausentes]
+        bloco = _normalizar_bloco(bloco)
+        if bloco.empty:
+            continue
+        nome = bloco["Nome da Pessoa"]
+        doc_tipo = bloco["Tipo de Documento"].mask(bloco["Tipo de Documento"] == "", "Nenhum")
+        doc_numero = bloco["Nº do Documento"]
+        funcao = bloco["Função do Participante"].mask(bloco["Função do Participante"] == "Outro", bloco["Função Customizada (se Outro)"])
+
+        problemas = {
+            "Nome da Pessoa vazio.": nome == "",
+            "Função do Participante vazia (ou 'Outro' sem a função customizada).": funcao == "",
+            "Tipo de Documento inválido (use Nenhum, CPF ou Matrícula).": ~doc_tipo.isin(TIPOS_DOCUMENTO),
+            "Nº do Documento vazio para o tipo de documento informado.": doc_tipo.isin(("CPF", "Matrícula")) & (doc_numero == ""),
+        }
+
+        doc_str = ("-" + doc_numero).where(doc_numero != "", "")
+        arquivo = (nome.str.replace(" ", "_") + doc_str).str.replace(CARACTERES_INVALIDOS_ARQUIVO, "_", regex=True) + ".pdf"
+        # O Windows não diferencia maiúsculas de minúsculas em nomes de arquivo.
+        chave_arquivo = arquivo.str.lower()
+
+        invalida = pd.concat(problemas.values(), axis=1).any(axis=1)
+        for mensagem, mascara in problemas.items():
+            for linha in mascara[mascara].index:
+                erros.append({'linha': int(linha), 'nome': nome[linha], 'erro': mensagem})
+
+        for linha, chave, nome_arquivo, pessoa, tipo, numero, papel in zip(bloco.index, chave_arquivo, arquivo, nome, doc_tipo, doc_numero, funcao):
+            if invalida[linha]:
+                continue
+            if chave in arquivos_vistos:
+                erros.append({'linha': int(linha), 'nome': pessoa, 'erro': f"Arquivo de saída {nome_arquivo} repetido (mesmo da linha {arquivos_vistos[chave]})."})
+                continue
+            arquivos_vistos[chave] = int(linha)
+            person_data = {**common_data, "nome": pessoa, "doc_tipo": tipo, "doc_numero": numero, "funcao_participante": papel}
+            tarefas.append({'indice': len(tarefas), 'linha': int(linha), 'dados': person_data, 'caminho_saida': os.path.join(output_folder, nome_arquivo), 'modo_saida': modo_saida, 'perfil': perfil})
+    erros.sort(key=lambda erro: erro['linha'])
+    return tarefas, erros
+
+
+def salvar_relatorio_erros(erros, caminho):
+    """Grava os erros de validação em um CSV separado por ';', que abre direto no Excel."""
+    import csv
+    with open(caminho, 'w', newline='', encoding='utf-8-sig') as arquivo:
+        escritor = csv.writer(arquivo, delimiter=';')
+        escritor.writerow(["Linha", "Nome da Pessoa", "Erro"])
+        for erro in erros:
+            escritor.writerow([erro['linha'], erro['nome'], erro['erro']])
+
+
+def resumir_erros(erros, limite=10):
+    """Texto curto com os primeiros erros, para mensagens ao usuário."""
+    linhas = [f"Linha {erro['linha']}: {erro['erro']}" for erro in erros[:limite]]
+    if len(erros) > limite:
+        linhas.append(f"... e mais {len(erros) - limite}.")
+    return "\n".join(linhas)
+
+
+def hash_entradas(dados, modo_saida='vetorial', perfil='padrao'):
+    """
+    Resume em um hash tudo o que determina o conteúdo de um certificado: os campos
+    da pessoa e do evento, o formato e o perfil do PDF e o conteúdo do modelo e das fontes.
+    É a mesma chave do cache de renderização (`cache_renderizacao.chave_certificado`).
+    """
+    return chave_certificado(dados, modo_saida, perfil)
+
+
+class ManifestoLote:
+    """
+    Registro de um lote em formato JSON Lines: uma linha por certificado processado,
+    com status, caminho de saída e hash das entradas. O arquivo só recebe acréscimos,
+    então uma execução interrompida perde no máximo a linha que estava sendo escrita;
+    ao ler, vale o último registro de cada caminho. Os caminhos são guardados absolutos,
+    então `--saida out` e `--saida ./out` retomam o mesmo lote.
+    """
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.registros = {}
+        if os.path.exists(caminho):
+            with open(caminho, encoding='utf-8') as arquivo:
+                for linha in arquivo:
+                    try:
+                        registro = json.loads(linha)
+                    except ValueError:
+                        continue  # Linha truncada por uma interrupção.
+                    self.registros[os.path.abspath(registro['caminho'])] = registro
+        self._arquivo = None
+
+    def concluida(self, caminho_saida, hash_atual):
+        """Indica se o certificado já foi gerado com exatamente estas entradas e ainda existe em disco."""
+        registro = self.registros.get(os.path.abspath(caminho_saida))
+        return bool(registro and registro['status'] == 'ok' and registro['hash'] == hash_atual and os.path.exists(caminho_saida))
+
+    def registrar(self, resultado, hash_atual, linha):
+        """Acrescenta o resultado de um certificado; `linha` é o número da linha na planilha."""
+        if self._arquivo is None:
+            self._arquivo = open(self.caminho, 'a', encoding='utf-8')
+        registro = {'linha': linha, 'status': 'ok' if resultado['sucesso'] else 'erro', 'caminho': os.path.abspath(resultado['caminho']), 'hash': hash_atual, 'erro': resultado['erro']}
+        self.registros[registro['caminho']] = registro
+        self._arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self._arquivo.flush()
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+
+
+# Ligado nos processos do pool quando o lote é instrumentado: cada resultado leva os tempos medidos no worker.
+_enviar_tempos = False
+
+
+def aquecer_worker(template_path, font_paths, font_size, instrumentar=False):
+    """Inicializador de cada processo (do lote e do serviço): decodifica o modelo e carrega as fontes uma única vez."""
+    global _enviar_tempos
+    if instrumentar:
+        core.ativar_instrumentacao()
+        _enviar_tempos = True
+    try:
+        with core.medir_etapa('carregar_modelo'):
+            core.carregar_modelo(template_path)
+        with core.medir_etapa('carregar_fonte'):
+            for font_path in font_paths:
+                core.carregar_fonte(font_path, font_size)
+    except Exception:
+        # Erros de recurso aparecem por linha, na renderização.
+        pass
+
+
+def renderizar_tarefa(tarefa, entrega='arquivo'):
+    """
+    Renderiza um certificado e o entrega conforme a saída do lote: 'arquivo' salva o PDF
+    em `caminho_saida`; 'bytes' devolve o PDF em `resultado['conteudo']`; 'pagina' devolve
+    a página pronta para um PDF único. Nunca levanta exceção: falhas voltam no resultado da linha.
+    """
+    resultado = {'indice': tarefa['indice'], 'caminho': tarefa['caminho_saida'], 'sucesso': False, 'erro': None}
+    modo, perfil = tarefa.get('modo_saida', 'vetorial'), tarefa.get('perfil', 'padrao')
+    try:
+        if entrega == 'arquivo':
+            sucesso, retorno = core.salvar_certificado(tarefa['caminho_saida'], tarefa['dados'], modo, perfil)
+        elif entrega == 'bytes':
+            buffer = io.BytesIO()
+            sucesso, retorno = core.salvar_certificado(buffer, tarefa['dados'], modo, perfil)
+            retorno = buffer.getvalue() if sucesso else retorno
+        else:
+            import pdf_vetorial
+            sucesso, retorno = pdf_vetorial.montar_pagina(tarefa['dados'], modo, perfil)
+        if not sucesso:
+            resultado['erro'] = retorno
+            return resultado
+        if entrega != 'arquivo':
+            resultado['conteudo'] = retorno
+        resultado['sucesso'] = True
+    except Exception as e:
+        resultado['erro'] = str(e)
+    finally:
+        if _enviar_tempos:
+            resultado['tempos'] = core.coletar_tempos()
+    return resultado
+
+
+class SaidaPasta:
+    """Saída padrão: um PDF por participante, salvo pelo próprio processo de renderização."""
+    entrega = 'arquivo'
+
+    def abrir(self): pass
+    def gravar(self, resultado): pass
+    def fechar(self): pass
+
+
+class SaidaZip:
+    """
+    Grava os PDFs diretamente como entradas de um arquivo ZIP, sem arquivos temporários.
+    Os PDFs já são compactados, então as entradas são apenas armazenadas.
+    """
+    entrega = 'bytes'
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._zip = None
+        self._nomes = set()
+
+    def abrir(self):
+        self._zip = zipfile.ZipFile(self.caminho, 'w', compression=zipfile.ZIP_STORED, allowZip64=True)
+
+    def gravar(self, resultado):
+        nome = os.path.basename(resultado['caminho'])
+        if nome in self._nomes:
+            resultado['sucesso'], resultado['erro'] = False, f"Já existe um certificado chamado {nome} no arquivo ZIP."
+            return
+        self._nomes.add(nome)
+        with self._zip.open(zipfile.ZipInfo(nome, date_time=time.localtime()[:6]), 'w', force_zip64=True) as entrada:
+            entrada.write(resultado['conteudo'])
+
+    def fechar(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+
+class SaidaPdfUnico:
+    """
+    Junta todos os certificados em um único PDF de várias páginas, escrito à medida que
+    as páginas chegam. O fundo do modelo e as fontes são gravados uma única vez e
+    compartilhados por todas as páginas em modo vetorial.
+    """
+    entrega = 'pagina'
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._arquivo = None
+        self._documento = None
+
+    def abrir(self):
+        import pdf_vetorial
+        self._arquivo = open(self.caminho, 'wb')
+        self._documento = pdf_vetorial.DocumentoPDF(self._arquivo)
+
+    def gravar(self, resultado):
+        with core.medir_etapa('codificar_pdf'):
+            self._documento.adicionar_pagina(resultado['conteudo'])
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._documento.fechar()
+            self._arquivo.close()
+            self._arquivo = self._documento = None
+
+
+# Tipos de saída do lote, na ordem em que aparecem na interface.
+SAIDAS_LOTE = {
+    'pasta': "Um PDF por participante (pasta)",
+    'zip': "Arquivo ZIP com um PDF por participante",
+    'pdf': "PDF único com todos os certificados",
+}
+
+
+def criar_saida(tipo, destino):
+    """Cria a saída do lote: `destino` é a pasta (tipo 'pasta') ou o arquivo .zip/.pdf a ser criado."""
+    if tipo == 'zip': return SaidaZip(destino)
+    if tipo == 'pdf': return SaidaPdfUnico(destino)
+    return SaidaPasta()
+
+
+class GeradorEmLote:
+    """
+    Motor de geração em lote, independente da interface gráfica.
+
+    Distribui as tarefas por um pool de processos (cada um com seu próprio cache
+    de modelo e fontes já aquecido) e devolve os resultados na ordem das linhas,
+    à medida que ficam prontos. O número de tarefas em andamento é limitado por
+    `janela`, então a memória não cresce com o tamanho da planilha.
+
+    `saida` decide o destino dos certificados (`SaidaPasta`, `SaidaZip` ou
+    `SaidaPdfUnico`); cada resultado é gravado nela antes de ser devolvido.
+
+    Com `instrumentar=True`, os tempos por etapa medidos nos processos são somados
+    à instrumentação do processo atual (veja `core.ativar_instrumentacao`).
+
+    Com um `cache` (`cache_renderizacao.CacheRenderizacao`), certificados cujas entradas
+    já foram renderizadas antes são copiados do cache neste processo, sem passar pelo
+    pool (o resultado vem com 'cache': True), e os renderizados são guardados nele.
+    O PDF único monta páginas, e não arquivos, então não usa o cache.
+    """
+    def __init__(self, processos=None, janela=None, saida=None, instrumentar=False, cache=None):
+        self.processos = processos or os.cpu_count() or 1
+        self.janela = janela or self.processos * 4
+        self.saida = saida or SaidaPasta()
+        self.instrumentar = instrumentar
+        self.cache = cache if self.saida.entrega != 'pagina' else None
+
+    def executar(self, tarefas, cancelado=None):
+        """
+        Gerador que produz um dicionário de resultado por tarefa, na ordem de entrada.
+        `cancelado` é uma função sem argumentos consultada entre as tarefas; quando
+        devolve True, nenhuma nova tarefa é iniciada e o gerador termina. A saída é
+        fechada em qualquer caso, com os certificados concluídos até ali.
+        """
+        if self.instrumentar and not core.instrumentacao_ativa():
+            core.ativar_instrumentacao()
+        self.saida.abrir()
+        chaves = {}
+        renderizacao = self._renderizar(tarefas, cancelado, chaves)
+        try:
+            for resultado in renderizacao:
+                tempos = resultado.pop('tempos', None)
+                if tempos:
+                    core.acrescentar_tempos(tempos)
+                if resultado['sucesso']:
+                    self.saida.gravar(resultado)
+                chave = chaves.pop(resultado['indice'], None)
+                if chave and resultado['sucesso'] and not resultado.get('cache'):
+                    try:
+                        self.cache.guardar(chave, arquivo=resultado['caminho'] if self.saida.entrega == 'arquivo' else None, conteudo=resultado.get('conteudo'))
+                    except OSError:
+                        pass  # Disco cheio ou sem permissão no cache: o certificado já foi gerado, só não fica guardado.
+                resultado.pop('conteudo', None)
+                yield resultado
+        finally:
+            renderizacao.close()
+            self.saida.fechar()
+
+    def _do_cache(self, tarefa, chaves):
+        """Resultado da tarefa tirado do cache, ou None se ela precisar ser renderizada."""
+        if self.cache is None:
+            return None
+        try:
+            chave = chave_certificado(tarefa['dados'], tarefa.get('modo_saida', 'vetorial'), tarefa.get('perfil', 'padrao'))
+        except OSError:
+            return None  # Modelo ou fonte inacessível: a renderização informa o erro da linha.
+        chaves[tarefa['indice']] = chave
+        resultado = {'indice': tarefa['indice'], 'caminho': tarefa['caminho_saida'], 'sucesso': True, 'erro': None, 'cache': True}
+        if self.saida.entrega == 'arquivo':
+            return resultado if self.cache.copiar_para(chave, tarefa['caminho_saida']) else None
+        resultado['conteudo'] = self.cache.ler(chave)
+        return resultado if resultado['conteudo'] is not None else None
+
+    def _renderizar(self, tarefas, cancelado, chaves):
+        tarefas = iter(tarefas)
+        primeira = next(tarefas, None)
+        if primeira is None:
+            return
+        dados = primeira['dados']
+        aquecimento = (dados['template_path'], (dados['font_path_regular'], dados['font_path_italic']), dados['font_size'])
+
+        if self.processos == 1:
+            aquecido = False
+            for tarefa in _encadear(primeira, tarefas):
+                if cancelado and cancelado():
+                    return
+                resultado = self._do_cache(tarefa, chaves)
+                if resultado is None:
+                    if not aquecido:
+                        aquecer_worker(*aquecimento); aquecido = True
+                    resultado = renderizar_tarefa(tarefa, self.saida.entrega)
+                yield resultado
+            return
+
+        # 'spawn' evita herdar o estado do Qt (threads, handles) em processos criados por fork.
+        # O pool só é criado na primeira tarefa que não está no cache. Se um processo morrer
+        # (falta de memória, falha em código nativo), as tarefas que estavam no pool falham
+        # linha a linha e um pool novo assume as seguintes.
+        contexto = multiprocessing.get_context('spawn')
+        novo_pool = lambda: ProcessPoolExecutor(max_workers=self.processos, mp_context=contexto, initializer=aquecer_worker, initargs=aquecimento + (self.instrumentar,))
+        pool = None
+        pendentes = deque()
+        try:
+            for tarefa in _encadear(primeira, tarefas):
+                if cancelado and cancelado():
+                    return
+                resultado = self._do_cache(tarefa, chaves)
+                if resultado is not None:
+                    futuro = Future(); futuro.set_result(resultado)
+                else:
+                    if pool is None:
+                        pool = novo_pool()
+                    try:
+                        futuro = pool.submit(renderizar_tarefa, tarefa, self.saida.entrega)
+                    except BrokenProcessPool:
+                        pool.shutdown(wait=False); pool = novo_pool()
+                        futuro = pool.submit(renderizar_tarefa, tarefa, self.saida.entrega)
+                pendentes.append((tarefa, futuro))
+                if len(pendentes) >= self.janela:
+                    yield _colher(*pendentes.popleft())
+            while pendentes:
+                if cancelado and cancelado():
+                    return
+                yield _colher(*pendentes.popleft())
+        finally:
+            for _, futuro in pendentes:
+                futuro.cancel()
+            if pool is not None:
+                pool.shutdown()
+
+
+def _colher(tarefa, futuro):
+    """Resultado de uma tarefa do pool; a morte do processo que a renderizava vira uma falha da linha."""
+    try:
+        return futuro.result()
+    except BrokenProcessPool:
+        erro = "O processo de renderização foi encerrado inesperadamente (falta de memória ou falha interna)."
+    except Exception as e:
+        erro = str(e)
+    return {'indice': tarefa['indice'], 'caminho': tarefa['caminho_saida'], 'sucesso': False, 'erro': erro}
+
+
+def _encadear(primeira, restantes):
+    yield primeira
+    yield from restantes
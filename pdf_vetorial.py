@@ -0,0 +1,437 @@
+"""
+Escrita de certificados em PDF com texto vetorial.
+
+O modelo entra uma única vez como imagem de fundo (XObject) e cada palavra é
+escrita como texto PDF na fonte TrueType embutida, na mesma posição calculada
+por `core.MotorDeLayout`. O resultado é menor, mais rápido de gerar e
+mantém o texto selecionável.
+
+Os PDFs são escritos de forma sequencial (sem `seek`), então o destino pode ser
+um arquivo comum ou um fluxo, como uma entrada de um arquivo ZIP.
+"""
+
+import io
+import os
+import re
+import zlib
+import struct
+import hashlib
+import functools
+
+from PIL import Image, ImageFont
+
+import core
+
+# Fontes simples em PDF usam codificação de um byte; a WinAnsi (Windows-1252) cobre o português.
+CODIFICACAO = 'cp1252'
+PRIMEIRO_CARACTERE, ULTIMO_CARACTERE = 32, 255
+
+# Mesma qualidade JPEG que o Pillow usa ao salvar o PDF em imagem.
+QUALIDADE_JPEG_PADRAO = 75
+# Limites da busca por um tamanho de arquivo (perfil 'email'): qualidade JPEG mais baixa
+# aceita antes de reduzir a resolução e lado mínimo da imagem reduzida.
+QUALIDADE_JPEG_MINIMA = 35
+LADO_MINIMO = 256
+# Espaço reservado no alvo de tamanho para a estrutura do PDF e o texto da página.
+RESERVA_ESTRUTURA = 8 * 1024
+
+_cache_fundos = core.CacheLRU(limite_bytes=64 * 1024 * 1024, limite_itens=16)
+
+
+def texto_suportado(certificado):
+    """Indica se todas as palavras do certificado podem ser escritas com a codificação WinAnsi."""
+    try:
+        for line in certificado['layout'].lines:
+            for word_info in line:
+                word_info['text'].encode(CODIFICACAO)
+        return True
+    except UnicodeEncodeError:
+        return False
+
+
+def codificar_imagem(imagem, qualidade=QUALIDADE_JPEG_PADRAO, alvo_bytes=None, sem_perdas_se_menor=True):
+    """
+    Codifica uma imagem RGB para um XObject: {'largura', 'altura', 'filtro', 'dados'}.
+    Sem `qualidade`, usa compressão sem perdas (FlateDecode). Com `qualidade`, usa JPEG
+    (DCTDecode), a menos que `sem_perdas_se_menor` e a versão sem perdas seja menor, o que
+    é comum em modelos com grandes áreas de cor chapada. Com `alvo_bytes`, reduz a qualidade
+    JPEG e, se não bastar, a resolução, até os dados caberem no alvo.
+    """
+    while True:
+        dados, filtro = None, None
+        if not qualidade or sem_perdas_se_menor:
+            dados, filtro = zlib.compress(imagem.tobytes(), 6), b"/FlateDecode"
+        if qualidade:
+            qualidades = range(qualidade, QUALIDADE_JPEG_MINIMA - 1, -10) if alvo_bytes else (qualidade,)
+            for atual in qualidades:
+                buffer = io.BytesIO()
+                imagem.save(buffer, format="JPEG", quality=atual)
+                if dados is None or buffer.tell() < len(dados):
+                    dados, filtro = buffer.getvalue(), b"/DCTDecode"
+                if not alvo_bytes or len(dados) <= alvo_bytes:
+                    break
+        if not alvo_bytes or len(dados) <= alvo_bytes or min(imagem.size) * 3 // 4 < LADO_MINIMO:
+            return {'largura': imagem.width, 'altura': imagem.height, 'filtro': filtro, 'dados': dados}
+        imagem = imagem.resize((imagem.width * 3 // 4, imagem.height * 3 // 4), Image.LANCZOS)
+
+
+def codificar_fundo(template_path, qualidade=QUALIDADE_JPEG_PADRAO, escala=1.0, alvo_bytes=None):
+    """
+    Codifica o modelo, reduzido por `escala`, como imagem de fundo (veja `codificar_imagem`),
+    com cache por modelo e parâmetros.
+    """
+    def carregar():
+        imagem = core.carregar_modelo(template_path, escala).convert("RGB")
+        fundo = {'chave': chave, **codificar_imagem(imagem, qualidade, alvo_bytes)}
+        return fundo, len(fundo['dados'])
+    chave = (core.assinatura_arquivo(template_path), qualidade, escala, alvo_bytes)
+    return _cache_fundos.obter(chave, carregar)
+
+
+def descrever_fonte(font_path):
+    """Métricas, larguras WinAnsi e arquivo compactado de uma fonte TrueType, com cache por versão do arquivo."""
+    return _descrever_fonte(*core.assinatura_arquivo(font_path))
+
+
+@functools.lru_cache(maxsize=32)
+def _descrever_fonte(caminho, mtime):
+    # Com tamanho 1000, medidas em pixels equivalem às unidades de glifo que o PDF espera.
+    fonte = ImageFont.truetype(caminho, size=1000)
+    ascent, descent = fonte.getmetrics()
+    larguras = []
+    for codigo in range(PRIMEIRO_CARACTERE, ULTIMO_CARACTERE + 1):
+        try:
+            caractere = bytes([codigo]).decode(CODIFICACAO)
+        except UnicodeDecodeError:
+            larguras.append(0)
+            continue
+        larguras.append(round(fonte.getlength(caractere)))
+    familia, estilo = fonte.getname()
+    estilo = estilo or "Regular"
+    italico = 'italic' in estilo.lower() or 'oblique' in estilo.lower()
+    nome = re.sub(r'[^A-Za-z0-9-]', '', f"{familia}-{estilo}") or "Fonte"
+    with open(caminho, 'rb') as arquivo:
+        dados = arquivo.read()
+    try:
+        dados = subconjunto_winansi(dados)
+        # Fontes embutidas como subconjunto levam no nome uma etiqueta de seis maiúsculas (ex.: "ABCDEF+"),
+        # como pede a especificação do PDF; aqui ela vem do hash do próprio subconjunto.
+        nome = "".join(chr(ord('A') + byte % 26) for byte in hashlib.sha256(dados).digest()[:6]) + "+" + nome
+    except (struct.error, KeyError, IndexError, ValueError):
+        pass  # Fonte com estrutura inesperada: embute o arquivo inteiro.
+    return {
+        'nome': nome,
+        'larguras': larguras,
+        'ascent': ascent,
+        'descent': descent,
+        'cap_height': ascent - fonte.getbbox('H')[1],
+        'italico': italico,
+        'dados': zlib.compress(dados, 6),
+        'tamanho_original': len(dados),
+    }
+
+
+# Tabelas necessárias para desenhar glifos a partir de uma fonte simples em PDF. As demais
+# (GSUB, GPOS, variações, etc.) não são usadas pelo leitor e ficam de fora do subconjunto.
+TABELAS_ESSENCIAIS = (b'OS/2', b'cmap', b'cvt ', b'fpgm', b'glyf', b'head', b'hhea', b'hmtx', b'loca', b'maxp', b'name', b'post', b'prep')
+
+
+def _glifos_do_cmap(cmap, codigos):
+    """Índices de glifo dos `codigos` Unicode, pela subtabela formato 4 (Windows, Unicode BMP) do cmap."""
+    quantidade = struct.unpack_from('>H', cmap, 2)[0]
+    for i in range(quantidade):
+        plataforma, codificacao, deslocamento = struct.unpack_from('>HHI', cmap, 4 + i * 8)
+        if plataforma == 3 and codificacao == 1 and struct.unpack_from('>H', cmap, deslocamento)[0] == 4:
+            break
+    else:
+        raise KeyError('cmap sem subtabela (3, 1) formato 4')
+    segmentos = struct.unpack_from('>H', cmap, deslocamento + 6)[0] // 2
+    base = deslocamento + 14
+    finais = struct.unpack_from('>%dH' % segmentos, cmap, base)
+    iniciais = struct.unpack_from('>%dH' % segmentos, cmap, base + 2 * segmentos + 2)
+    deltas = struct.unpack_from('>%dh' % segmentos, cmap, base + 4 * segmentos + 2)
+    inicio_offsets = base + 6 * segmentos + 2
+    offsets = struct.unpack_from('>%dH' % segmentos, cmap, inicio_offsets)
+    glifos = set()
+    for codigo in codigos:
+        for i in range(segmentos):
+            if iniciais[i] <= codigo <= finais[i]:
+                if offsets[i] == 0:
+                    glifos.add((codigo + deltas[i]) & 0xFFFF)
+                else:
+                    posicao = inicio_offsets + 2 * i + offsets[i] + 2 * (codigo - iniciais[i])
+                    glifo = struct.unpack_from('>H', cmap, posicao)[0]
+                    if glifo:
+                        glifos.add((glifo + deltas[i]) & 0xFFFF)
+                break
+    return glifos
+
+
+def _componentes(glifo):
+    """Glifos referenciados por um glifo composto."""
+    if len(glifo) < 10 or struct.unpack_from('>h', glifo, 0)[0] >= 0:
+        return []
+    componentes, posicao = [], 10
+    while True:
+        flags, indice = struct.unpack_from('>HH', glifo, posicao)
+        componentes.append(indice)
+        posicao += 4 + (4 if flags & 0x0001 else 2)
+        posicao += 8 if flags & 0x0080 else 4 if flags & 0x0040 else 2 if flags & 0x0008 else 0
+        if not flags & 0x0020:
+            return componentes
+
+
+def _checksum(dados):
+    dados += b'\0' * (-len(dados) % 4)
+    return sum(struct.unpack('>%dI' % (len(dados) // 4), dados)) & 0xFFFFFFFF
+
+
+def subconjunto_winansi(dados):
+    """
+    Reduz uma fonte TrueType aos glifos dos caracteres WinAnsi (e seus componentes).
+    Os índices de glifo são mantidos; glifos não usados ficam vazios, tabelas que o PDF
+    não usa são removidas e, em fontes variáveis, resta a instância padrão.
+    """
+    quantidade = struct.unpack_from('>H', dados, 4)[0]
+    tabelas = {}
+    for i in range(quantidade):
+        tag, _, deslocamento, tamanho = struct.unpack_from('>4sIII', dados, 12 + i * 16)
+        tabelas[tag] = dados[deslocamento:deslocamento + tamanho]
+
+    head = bytearray(tabelas[b'head'])
+    total_glifos = struct.unpack_from('>H', tabelas[b'maxp'], 4)[0]
+    formato_loca = '>%dI' % (total_glifos + 1) if struct.unpack_from('>h', head, 50)[0] else '>%dH' % (total_glifos + 1)
+    loca = struct.unpack(formato_loca, tabelas[b'loca'][:struct.calcsize(formato_loca)])
+    if formato_loca.endswith('H'):
+        loca = [offset * 2 for offset in loca]
+    glyf = tabelas[b'glyf']
+
+    codigos = [ord(bytes([c]).decode(CODIFICACAO)) for c in range(PRIMEIRO_CARACTERE, ULTIMO_CARACTERE + 1) if c not in (0x81, 0x8D, 0x8F, 0x90, 0x9D)]
+    pendentes = {0} | _glifos_do_cmap(tabelas[b'cmap'], codigos)
+    usados = set()
+    while pendentes:
+        indice = pendentes.pop()
+        if indice in usados or indice >= total_glifos:
+            continue
+        usados.add(indice)
+        pendentes.update(_componentes(glyf[loca[indice]:loca[indice + 1]]))
+
+    novo_glyf, nova_loca = bytearray(), []
+    for indice in range(total_glifos):
+        nova_loca.append(len(novo_glyf))
+        if indice in usados:
+            novo_glyf += glyf[loca[indice]:loca[indice + 1]]
+            novo_glyf += b'\0' * (-len(novo_glyf) % 4)
+    nova_loca.append(len(novo_glyf))
+
+    struct.pack_into('>h', head, 50, 1)  # indexToLocFormat: offsets de 32 bits.
+    struct.pack_into('>I', head, 8, 0)  # checkSumAdjustment: recalculado abaixo.
+    tabelas[b'head'] = bytes(head)
+    tabelas[b'glyf'] = bytes(novo_glyf)
+    tabelas[b'loca'] = struct.pack('>%dI' % len(nova_loca), *nova_loca)
+    # post formato 3: sem nomes de glifos, que o PDF não usa com a codificação WinAnsi.
+    tabelas[b'post'] = b'\x00\x03\x00\x00' + tabelas[b'post'][4:32]
+
+    tags = sorted(tag for tag in tabelas if tag in TABELAS_ESSENCIAIS)
+    potencia = 1
+    while potencia * 2 <= len(tags):
+        potencia *= 2
+    cabecalho = struct.pack('>IHHHH', 0x00010000, len(tags), potencia * 16, potencia.bit_length() - 1, len(tags) * 16 - potencia * 16)
+    diretorio, corpo = bytearray(), bytearray()
+    deslocamento = len(cabecalho) + 16 * len(tags)
+    for tag in tags:
+        tabela = tabelas[tag]
+        diretorio += struct.pack('>4sIII', tag, _checksum(tabela), deslocamento + len(corpo), len(tabela))
+        corpo += tabela + b'\0' * (-len(tabela) % 4)
+    fonte = bytearray(cabecalho + diretorio + corpo)
+    posicao_head = len(cabecalho) + 16 * len(tags) + sum(len(tabelas[tag]) + (-len(tabelas[tag]) % 4) for tag in tags[:tags.index(b'head')])
+    struct.pack_into('>I', fonte, posicao_head + 8, (0xB1B0AFBA - _checksum(bytes(fonte))) & 0xFFFFFFFF)
+    return bytes(fonte)
+
+
+def _numero(valor):
+    """Formata um número para o PDF, sem zeros desnecessários."""
+    texto = f"{valor:.3f}".rstrip('0').rstrip('.')
+    return (texto if texto not in ('', '-0') else '0').encode('ascii')
+
+
+def _texto_pdf(texto):
+    dados = texto.encode(CODIFICACAO, errors='replace')
+    return b"(" + dados.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+class DocumentoPDF:
+    """
+    Escreve um PDF página a página em um arquivo binário. Imagens de fundo e fontes
+    são gravadas uma única vez por documento e compartilhadas por todas as páginas
+    que as usam; apenas a lista de páginas fica em memória até o `fechar()`.
+    """
+    def __init__(self, arquivo):
+        self._arquivo = arquivo
+        self._posicao = 0
+        self._offsets = {}
+        self._proximo_objeto = 1
+        self._paginas = []
+        self._imagens = {}
+        self._fontes = {}
+        self._escrever(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._objeto_catalogo = self._reservar()
+        self._objeto_paginas = self._reservar()
+
+    def _reservar(self):
+        numero = self._proximo_objeto
+        self._proximo_objeto += 1
+        return numero
+
+    def _escrever(self, dados):
+        self._arquivo.write(dados)
+        self._posicao += len(dados)
+
+    def _gravar_objeto(self, numero, dicionario, stream=None):
+        self._offsets[numero] = self._posicao
+        self._escrever(b"%d 0 obj\n" % numero + dicionario)
+        if stream is not None:
+            self._escrever(b"\nstream\n" + stream + b"\nendstream")
+        self._escrever(b"\nendobj\n")
+
+    def _imagem(self, fundo):
+        """
+        Grava a imagem de fundo na primeira vez que ela aparece e devolve (nome do recurso, objeto).
+        Imagens sem `chave` (páginas rasterizadas) são exclusivas da página e não ficam registradas.
+        """
+        chave = fundo['chave']
+        if chave not in self._imagens:
+            numero = self._reservar()
+            self._gravar_objeto(numero, b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter %s /Length %d >>" % (fundo['largura'], fundo['altura'], fundo['filtro'], len(fundo['dados'])), fundo['dados'])
+            if chave is None:
+                return b"Im", numero
+            self._imagens[chave] = (b"Im%d" % len(self._imagens), numero)
+        return self._imagens[chave]
+
+    def _fonte(self, font_path):
+        """Embute a fonte na primeira vez que ela aparece e devolve (nome do recurso, objeto)."""
+        chave = os.path.abspath(font_path)
+        if chave not in self._fontes:
+            info = descrever_fonte(font_path)
+            arquivo, descritor, fonte = self._reservar(), self._reservar(), self._reservar()
+            self._gravar_objeto(arquivo, b"<< /Length %d /Length1 %d /Filter /FlateDecode >>" % (len(info['dados']), info['tamanho_original']), info['dados'])
+            flags = 32 + (64 if info['italico'] else 0)
+            self._gravar_objeto(descritor, b"<< /Type /FontDescriptor /FontName /%s /Flags %d /FontBBox [-1000 %d 2500 %d] /ItalicAngle %d /Ascent %d /Descent %d /CapHeight %d /StemV 80 /FontFile2 %d 0 R >>" % (
+                info['nome'].encode('ascii'), flags, -info['descent'], info['ascent'], -12 if info['italico'] else 0, info['ascent'], -info['descent'], info['cap_height'], arquivo))
+            larguras = b" ".join(b"%d" % largura for largura in info['larguras'])
+            self._gravar_objeto(fonte, b"<< /Type /Font /Subtype /TrueType /BaseFont /%s /FirstChar %d /LastChar %d /Widths [%s] /FontDescriptor %d 0 R /Encoding /WinAnsiEncoding >>" % (
+                info['nome'].encode('ascii'), PRIMEIRO_CARACTERE, ULTIMO_CARACTERE, larguras, descritor))
+            self._fontes[chave] = (b"F%d" % len(self._fontes), fonte, info)
+        return self._fontes[chave]
+
+    def _fundo_vetorial(self, pagina):
+        """Fundo de uma página vetorial no perfil da página; o alvo de tamanho desconta as fontes embutidas."""
+        perfil = core.PERFIS_SAIDA[pagina.get('perfil', 'padrao')]
+        alvo = perfil['alvo_bytes']
+        if alvo:
+            fontes = {os.path.abspath(caminho) for caminho in pagina['font_paths'].values()}
+            alvo = max(alvo // 4, alvo - RESERVA_ESTRUTURA - sum(len(descrever_fonte(caminho)['dados']) for caminho in fontes))
+        return codificar_fundo(pagina['template_path'], perfil['qualidade'], perfil['escala'], alvo)
+
+    def adicionar_pagina(self, pagina):
+        """
+        Acrescenta uma página descrita por `descrever_pagina` ou `pagina_em_imagem`.
+        Um pixel do modelo corresponde a um ponto do PDF, como no PDF gerado a partir da imagem.
+        """
+        fundo = pagina.get('fundo') or self._fundo_vetorial(pagina)
+        nome_imagem, objeto_imagem = self._imagem(fundo)
+        largura, altura = pagina['tamanho']
+
+        fontes_pagina = {}
+        conteudo = [b"q %s 0 0 %s 0 0 cm /%s Do Q" % (_numero(largura), _numero(altura), nome_imagem)]
+        if pagina['lines']:
+            conteudo.append(b"BT 0 g")
+            fonte_atual = None
+            for line in pagina['lines']:
+                for word_info in line:
+                    nome_fonte, objeto_fonte, info = self._fonte(pagina['font_paths'][word_info['style']])
+                    fontes_pagina[nome_fonte] = objeto_fonte
+                    if nome_fonte != fonte_atual:
+                        conteudo.append(b"/%s %s Tf" % (nome_fonte, _numero(pagina['font_size'])))
+                        fonte_atual = nome_fonte
+                    # O texto da imagem é ancorado no topo do ascendente; no PDF, na linha de base.
+                    linha_de_base = word_info['y'] + info['ascent'] * pagina['font_size'] / 1000
+                    conteudo.append(b"1 0 0 1 %s %s Tm %s Tj" % (_numero(word_info['x']), _numero(altura - linha_de_base), _texto_pdf(word_info['text'])))
+            conteudo.append(b"ET")
+        stream = zlib.compress(b"\n".join(conteudo), 6)
+
+        objeto_conteudo, objeto_pagina = self._reservar(), self._reservar()
+        self._gravar_objeto(objeto_conteudo, b"<< /Length %d /Filter /FlateDecode >>" % len(stream), stream)
+        recursos_fontes = b" ".join(b"/%s %d 0 R" % (nome, objeto) for nome, objeto in fontes_pagina.items())
+        self._gravar_objeto(objeto_pagina, b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %s %s] /Resources << /XObject << /%s %d 0 R >> /Font << %s >> >> /Contents %d 0 R >>" % (
+            self._objeto_paginas, _numero(largura), _numero(altura), nome_imagem, objeto_imagem, recursos_fontes, objeto_conteudo))
+        self._paginas.append(objeto_pagina)
+
+    def fechar(self):
+        """Grava a árvore de páginas, o catálogo, a tabela xref e o trailer."""
+        filhos = b" ".join(b"%d 0 R" % pagina for pagina in self._paginas)
+        self._gravar_objeto(self._objeto_paginas, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (filhos, len(self._paginas)))
+        self._gravar_objeto(self._objeto_catalogo, b"<< /Type /Catalog /Pages %d 0 R >>" % self._objeto_paginas)
+        inicio_xref = self._posicao
+        total = self._proximo_objeto
+        entradas = [b"xref\n0 %d\n0000000000 65535 f \n" % total]
+        entradas.extend(b"%010d 00000 n \n" % self._offsets[numero] for numero in range(1, total))
+        self._escrever(b"".join(entradas))
+        self._escrever(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (total, self._objeto_catalogo, inicio_xref))
+
+
+def descrever_pagina(certificado, perfil='padrao'):
+    """
+    Reduz um certificado montado por `core.montar_certificado` a uma página com texto
+    vetorial, só com tipos simples (pode ser enviada entre processos).
+    """
+    return {
+        'template_path': certificado['template_path'], 'tamanho': certificado['tamanho'], 'perfil': perfil,
+        'font_size': certificado['font_size'], 'font_paths': certificado['font_paths'],
+        'lines': [[{'text': w['text'], 'style': w['style'], 'x': w['x'], 'y': w['y']} for w in line] for line in certificado['layout'].lines],
+    }
+
+
+def pagina_em_imagem(imagem, qualidade=QUALIDADE_JPEG_PADRAO, tamanho=None, alvo_bytes=None):
+    """
+    Página inteira rasterizada, com a imagem do certificado já desenhada como fundo e sem texto PDF.
+    `tamanho` é o da página em pontos (o do modelo); por padrão, o da própria imagem.
+    """
+    with core.medir_etapa('converter_rgb'):
+        imagem = imagem.convert("RGB")
+    with core.medir_etapa('codificar_imagem'):
+        fundo = {'chave': None, **codificar_imagem(imagem, qualidade, alvo_bytes and alvo_bytes - RESERVA_ESTRUTURA, sem_perdas_se_menor=False)}
+    return {'fundo': fundo, 'tamanho': tamanho or imagem.size, 'lines': []}
+
+
+def montar_pagina(dados, modo='vetorial', perfil='padrao'):
+    """
+    Gera a página do certificado descrito por `dados` (os argumentos de `core.gerar_certificado`),
+    no modo 'vetorial' ou 'imagem' e no perfil de `core.PERFIS_SAIDA` pedido. No modo imagem,
+    o certificado é desenhado direto na resolução do perfil.
+    Devolve (sucesso, página ou mensagem de erro).
+    """
+    if modo == 'vetorial':
+        sucesso, certificado = core.montar_certificado(**dados)
+        if not sucesso:
+            return False, certificado
+        # Fontes simples em PDF só cobrem o Windows-1252; textos fora dele caem no modo imagem.
+        if texto_suportado(certificado):
+            return True, descrever_pagina(certificado, perfil)
+    config = core.PERFIS_SAIDA[perfil]
+    sucesso, imagem = core.gerar_certificado(**dados, escala=config['escala'])
+    if not sucesso:
+        return False, imagem
+    tamanho = core.carregar_modelo(dados['template_path']).size
+    return True, pagina_em_imagem(imagem, config['qualidade'], tamanho, config['alvo_bytes'])
+
+
+def salvar_pdf(destino, pagina):
+    """Salva um PDF de uma página (de `montar_pagina`) em `destino` (caminho ou arquivo binário aberto para escrita)."""
+    if isinstance(destino, (str, os.PathLike)):
+        with open(destino, 'wb') as arquivo:
+            salvar_pdf(arquivo, pagina)
+        return
+    documento = DocumentoPDF(destino)
+    documento.adicionar_pagina(pagina)
+    documento.fechar()
@@ -0,0 +1,409 @@
+# --- servico.py (serviço HTTP local de emissão de certificados) ---
+#
+# Exemplo:
+#   python servico.py --porta 8765 --processos 4
+#
+# Escuta apenas em 127.0.0.1 e não depende de nada além da biblioteca padrão e do
+# próprio gerador. Rotas:
+#
+#   POST /certificados  um certificado; responde com o PDF.
+#       {"atividade": "Palestra", "evento": "Semana de História", "horas": "5",
+#        "nome": "Fulano de Tal", "funcao": "Ouvinte", "doc_tipo": "CPF", "doc_numero": "111.222.333-44"}
+#
+#   POST /lotes         vários certificados com os mesmos dados do evento; responde em
+#       JSON Lines (um objeto por linha, na ordem em que ficam prontos), com o PDF em base64.
+#       {"atividade": ..., "evento": ..., "horas": ...,
+#        "participantes": [{"nome": ..., "funcao": ..., "doc_tipo": ..., "doc_numero": ...}, ...]}
+#
+#   GET  /metricas      profundidade da fila, certificados em andamento e latências.
+#
+# Campos opcionais do evento: "modelo" (arquivo da pasta de modelos), "fonte" (família),
+# "tamanho_fonte" (de 10 a 200), "italico", "formato" (uma das chaves de core.MODOS_SAIDA) e "perfil"
+# (uma das chaves de core.PERFIS_SAIDA).
+#
+# A fila de certificados tem capacidade fixa. Quando está cheia, /certificados responde
+# 503 com Retry-After; /lotes não é recusado, mas só acrescenta participantes à fila à
+# medida que há espaço, então um lote grande não esgota a memória do serviço.
+
+import os
+import sys
+import json
+import time
+import base64
+import asyncio
+import argparse
+import traceback
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from catalogo import carregar_catalogo
+from core import formatar_carga_horaria, ATIVIDADES_SEM_NOME, MODOS_SAIDA, PERFIS_SAIDA, TAMANHO_FONTE_MINIMO, TAMANHO_FONTE_MAXIMO
+from lote import COLUNAS_PLANILHA, aquecer_worker, montar_tarefas, renderizar_tarefa
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HOST = "127.0.0.1"
+LIMITE_CORPO = 64 * 1024 * 1024
+AMOSTRAS_LATENCIA = 1000
+
+# Campos de cada participante no JSON e a coluna correspondente da planilha.
+CAMPOS_PARTICIPANTE = dict(zip(("nome", "doc_tipo", "doc_numero", "funcao", "funcao_customizada"), COLUNAS_PLANILHA))
+
+STATUS_HTTP = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class ErroRequisicao(Exception):
+    """Erro que vira uma resposta HTTP com `status` e uma mensagem em JSON."""
+    def __init__(self, status, mensagem, detalhes=None):
+        super().__init__(mensagem)
+        self.status = status
+        self.detalhes = detalhes
+
+
+def _texto(corpo, campo, padrao=""):
+    """Campo de texto do corpo (ou `padrao`, se ausente ou vazio); outro tipo de valor é recusado com 400."""
+    valor = corpo.get(campo) or padrao
+    if not isinstance(valor, str):
+        raise ErroRequisicao(400, f"O campo '{campo}' deve ser um texto.")
+    return valor
+
+
+def _percentil(valores, fracao):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return round(ordenados[min(len(ordenados) - 1, int(fracao * len(ordenados)))] * 1000, 2)
+
+
+class ServicoCertificados:
+    """
+    Serviço assíncrono de emissão. As requisições viram tarefas do lote (as mesmas de
+    `lote.montar_tarefas`) que passam por uma fila limitada; um conjunto de consumidores
+    leva cada tarefa a um pool de processos, aquecido na partida com o modelo e as fontes
+    padrão, e cada processo mantém seus caches de modelos e fontes entre as requisições.
+    """
+    def __init__(self, modelos_dir, fontes_dir, modelo_padrao="template.png", fonte_padrao="Open_Sans", tamanho_fonte=50, processos=None, capacidade_fila=256):
+        self.modelos_dir = modelos_dir
+        self.fontes_dir = fontes_dir
+        self.catalogo = carregar_catalogo(fontes_dir, modelos_dir)
+        self.modelo_padrao = modelo_padrao
+        self.fonte_padrao = fonte_padrao
+        self.tamanho_fonte = tamanho_fonte
+        self.processos = processos or os.cpu_count() or 1
+        self.capacidade_fila = capacidade_fila
+        self.fila = None
+        self.pool = None
+        self.em_andamento = 0
+        self.contadores = {'concluidos': 0, 'falhas': 0, 'recusados': 0}
+        self.espera = deque(maxlen=AMOSTRAS_LATENCIA)
+        self.latencia = deque(maxlen=AMOSTRAS_LATENCIA)
+        self.inicio = time.time()
+
+    # --- Fila e pool de renderização ---
+
+    def _iniciar_pool(self):
+        if self.fonte_padrao not in self.catalogo['fontes']:
+            raise ValueError(f"Fonte '{self.fonte_padrao}' não encontrada em {self.fontes_dir}.")
+        fontes = self.catalogo['fontes'][self.fonte_padrao]
+        aquecimento = (os.path.join(self.modelos_dir, self.modelo_padrao), (fontes['regular'], fontes['italic']), self.tamanho_fonte)
+        contexto = multiprocessing.get_context('spawn')
+        self.pool = ProcessPoolExecutor(max_workers=self.processos, mp_context=contexto, initializer=aquecer_worker, initargs=aquecimento)
+        # Força a criação dos processos agora, e não na primeira requisição.
+        for futuro in [self.pool.submit(time.sleep, 0) for _ in range(self.processos)]:
+            futuro.result()
+
+    async def _consumir(self):
+        """Leva tarefas da fila ao pool; cada consumidor mantém no máximo uma tarefa no pool."""
+        loop = asyncio.get_running_loop()
+        while True:
+            tarefa, futuro, enfileirada = await self.fila.get()
+            try:
+                if futuro.cancelled():
+                    continue  # O cliente desistiu (ex.: conexão de um lote encerrada).
+                self.espera.append(time.perf_counter() - enfileirada)
+                self.em_andamento += 1
+                try:
+                    resultado = await loop.run_in_executor(self.pool, renderizar_tarefa, tarefa, 'bytes')
+                except Exception as e:
+                    resultado = {'indice': tarefa['indice'], 'caminho': tarefa['caminho_saida'], 'sucesso': False, 'erro': str(e)}
+                finally:
+                    self.em_andamento -= 1
+                self.latencia.append(time.perf_counter() - enfileirada)
+                self.contadores['concluidos' if resultado['sucesso'] else 'falhas'] += 1
+                if not futuro.done():
+                    futuro.set_result(resultado)
+            finally:
+                self.fila.task_done()
+
+    def enfileirar(self, tarefa):
+        """Põe a tarefa na fila sem esperar; levanta ErroRequisicao(503) se a fila estiver cheia."""
+        futuro = asyncio.get_running_loop().create_future()
+        try:
+            self.fila.put_nowait((tarefa, futuro, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.contadores['recusados'] += 1
+            raise ErroRequisicao(503, "Fila de certificados cheia; tente novamente em instantes.")
+        return futuro
+
+    async def enfileirar_aguardando(self, tarefa):
+        """Põe a tarefa na fila, esperando por espaço se ela estiver cheia."""
+        futuro = asyncio.get_running_loop().create_future()
+        await self.fila.put((tarefa, futuro, time.perf_counter()))
+        return futuro
+
+    def metricas(self):
+        return {
+            'fila': self.fila.qsize() if self.fila else 0,
+            'capacidade_fila': self.capacidade_fila,
+            'em_andamento': self.em_andamento,
+            'processos': self.processos,
+            **self.contadores,
+            'espera_fila_ms': {'p50': _percentil(self.espera, 0.5), 'p95': _percentil(self.espera, 0.95), 'max': _percentil(self.espera, 1.0)},
+            'latencia_ms': {'p50': _percentil(self.latencia, 0.5), 'p95': _percentil(self.latencia, 0.95), 'max': _percentil(self.latencia, 1.0)},
+            'amostras': len(self.latencia),
+            'ativo_ha_s': round(time.time() - self.inicio, 1),
+        }
+
+    # --- Conversão das requisições em tarefas ---
+
+    def _dados_evento(self, corpo):
+        """Dados comuns a todos os certificados da requisição, no formato de `core.gerar_certificado`."""
+        atividade = _texto(corpo, 'atividade').strip()
+        evento = _texto(corpo, 'evento').strip()
+        horas = corpo.get('horas')
+        if not isinstance(horas, (int, float)) or isinstance(horas, bool):
+            horas = _texto(corpo, 'horas')  # Número (ex.: 5) ou texto (ex.: "5h").
+        horas = str(horas).strip()
+        if not atividade or not horas:
+            raise ErroRequisicao(400, "Os campos 'atividade' e 'horas' são obrigatórios.")
+        if atividade not in ATIVIDADES_SEM_NOME and not evento:
+            raise ErroRequisicao(400, f"A atividade '{atividade}' exige o campo 'evento'.")
+        modelo = _texto(corpo, 'modelo', self.modelo_padrao)
+        if modelo not in self.catalogo['modelos']:
+            raise ErroRequisicao(400, f"Modelo '{modelo}' não encontrado. Disponíveis: {', '.join(self.catalogo['modelos']) or 'nenhum'}.")
+        fonte = _texto(corpo, 'fonte', self.fonte_padrao)
+        if fonte not in self.catalogo['fontes']:
+            raise ErroRequisicao(400, f"Fonte '{fonte}' não encontrada. Disponíveis: {', '.join(sorted(self.catalogo['fontes'])) or 'nenhuma'}.")
+        formato = _texto(corpo, 'formato', 'vetorial')
+        if formato not in MODOS_SAIDA:
+            raise ErroRequisicao(400, f"Formato '{formato}' inválido. Use: {', '.join(MODOS_SAIDA)}.")
+        perfil = _texto(corpo, 'perfil', 'padrao')
+        if perfil not in PERFIS_SAIDA:
+            raise ErroRequisicao(400, f"Perfil '{perfil}' inválido. Use: {', '.join(PERFIS_SAIDA)}.")
+        tamanho_fonte = corpo.get('tamanho_fonte') or self.tamanho_fonte
+        try:
+            if isinstance(tamanho_fonte, bool):
+                raise TypeError
+            tamanho_fonte = int(tamanho_fonte)
+        except (TypeError, ValueError, OverflowError):
+            raise ErroRequisicao(400, "O campo 'tamanho_fonte' deve ser um número inteiro.")
+        if not TAMANHO_FONTE_MINIMO <= tamanho_fonte <= TAMANHO_FONTE_MAXIMO:
+            raise ErroRequisicao(400, f"O campo 'tamanho_fonte' deve estar entre {TAMANHO_FONTE_MINIMO} e {TAMANHO_FONTE_MAXIMO}.")
+        dados = {
+            "tipo_atividade": atividade, "nome_evento": evento if atividade not in ATIVIDADES_SEM_NOME else "",
+            "carga_horaria": formatar_carga_horaria(horas), "template_path": os.path.join(self.modelos_dir, modelo),
+            "font_path_regular": self.catalogo['fontes'][fonte]['regular'], "font_path_italic": self.catalogo['fontes'][fonte]['italic'],
+            "font_size": tamanho_fonte, "use_italic": bool(corpo.get('italico')),
+        }
+        return dados, formato, perfil
+
+    def montar_tarefas(self, corpo, participantes):
+        """
+        Valida os participantes com as mesmas regras da planilha e devolve as tarefas.
+        Qualquer linha inválida recusa a requisição inteira (422), com a lista de erros.
+        """
+        import pandas as pd
+        dados, formato, perfil = self._dados_evento(corpo)
+        if not isinstance(participantes, list) or not participantes or not all(isinstance(p, dict) for p in participantes):
+            raise ErroRequisicao(400, "Informe ao menos um participante (objetos JSON com 'nome', 'funcao' etc.).")
+        linhas = [{coluna: str(p.get(campo) if p.get(campo) is not None else "") for campo, coluna in CAMPOS_PARTICIPANTE.items()} for p in participantes]
+        # Índice como na planilha (cabeçalho na linha 1), para reaproveitar a validação do lote.
+        bloco = pd.DataFrame(linhas, columns=COLUNAS_PLANILHA, index=range(2, len(linhas) + 2))
+        tarefas, erros = montar_tarefas([bloco], dados, "", formato, perfil)
+        if erros:
+            raise ErroRequisicao(422, "Há participantes com dados inválidos.", [{'indice': erro['linha'] - 2, 'nome': erro['nome'], 'erro': erro['erro']} for erro in erros])
+        for tarefa in tarefas:
+            tarefa['indice'] = tarefa['linha'] - 2
+        return tarefas
+
+    # --- HTTP ---
+
+    async def _certificado(self, corpo, escritor):
+        tarefa = self.montar_tarefas(corpo, [corpo])[0]
+        resultado = await self.enfileirar(tarefa)
+        if not resultado['sucesso']:
+            raise ErroRequisicao(500, resultado['erro'])
+        nome_arquivo = os.path.basename(tarefa['caminho_saida']).encode('ascii', 'replace').decode('ascii').replace('"', '_')
+        await _responder(escritor, 200, resultado['conteudo'], "application/pdf", {"Content-Disposition": f'attachment; filename="{nome_arquivo}"'})
+
+    async def _lote(self, corpo, escritor):
+        tarefas = self.montar_tarefas(corpo, corpo.get('participantes'))
+        escritor.write(_cabecalho(200, "application/x-ndjson", {"Transfer-Encoding": "chunked", "X-Total": str(len(tarefas))}))
+        # No máximo `processos * 4` resultados do lote em andamento ou esperando envio: o
+        # produtor só enfileira a próxima linha depois que uma já foi escrita para o cliente.
+        prontos, enfileirados, em_voo = asyncio.Queue(), set(), asyncio.Semaphore(self.processos * 4)
+
+        async def produzir():
+            for tarefa in tarefas:
+                await em_voo.acquire()
+                futuro = await self.enfileirar_aguardando(tarefa)
+                futuro.add_done_callback(prontos.put_nowait)
+                enfileirados.add(futuro)
+
+        produtor = asyncio.ensure_future(produzir())
+        try:
+            for _ in tarefas:
+                futuro = await prontos.get()
+                enfileirados.discard(futuro)
+                resultado = futuro.result()
+                linha = {'indice': resultado['indice'], 'arquivo': os.path.basename(resultado['caminho']), 'sucesso': resultado['sucesso'], 'erro': resultado['erro']}
+                if resultado['sucesso']:
+                    linha['pdf'] = base64.b64encode(resultado['conteudo']).decode('ascii')
+                _escrever_bloco(escritor, (json.dumps(linha, ensure_ascii=False) + "\n").encode('utf-8'))
+                await escritor.drain()
+                em_voo.release()
+            escritor.write(b"0\r\n\r\n")
+            await escritor.drain()
+        finally:
+            # Se o cliente desconectou no meio do lote, o restante sai da fila sem ser renderizado.
+            produtor.cancel()
+            for futuro in enfileirados:
+                futuro.cancel()
+
+    async def _atender(self, leitor, escritor):
+        """Atende uma conexão (com keep-alive) até o cliente fechá-la."""
+        try:
+            while True:
+                manter = False
+                try:
+                    requisicao = await _ler_requisicao(leitor)
+                    if requisicao is None:
+                        break
+                    metodo, caminho, cabecalhos, corpo = requisicao
+                    manter = cabecalhos.get('connection', '').lower() != 'close'
+                    await self._rotear(metodo, caminho.split('?', 1)[0], corpo, escritor)
+                except ErroRequisicao as e:
+                    # Erros na leitura (ex.: 413, corpo não lido) deixam `manter` falso e encerram a conexão.
+                    extras = {"Retry-After": "1"} if e.status == 503 else {}
+                    resposta = {'erro': str(e), **({'detalhes': e.detalhes} if e.detalhes else {})}
+                    await _responder(escritor, e.status, json.dumps(resposta, ensure_ascii=False).encode('utf-8'), "application/json; charset=utf-8", extras)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception:
+                    # Falha inesperada: responde 500 e encerra a conexão, em vez de deixar o cliente sem resposta.
+                    traceback.print_exc()
+                    manter = False
+                    await _responder(escritor, 500, json.dumps({'erro': "Erro interno do serviço."}, ensure_ascii=False).encode('utf-8'), "application/json; charset=utf-8")
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _rotear(self, metodo, caminho, corpo, escritor):
+        rotas = {'/certificados': ('POST', self._certificado), '/lotes': ('POST', self._lote), '/metricas': ('GET', None)}
+        if caminho not in rotas:
+            raise ErroRequisicao(404, f"Rota {caminho} não existe.")
+        if metodo != rotas[caminho][0]:
+            raise ErroRequisicao(405, f"Use {rotas[caminho][0]} em {caminho}.")
+        if caminho == '/metricas':
+            await _responder(escritor, 200, json.dumps(self.metricas()).encode('utf-8'), "application/json")
+            return
+        try:
+            dados = json.loads(corpo.decode('utf-8'))
+        except ValueError:
+            raise ErroRequisicao(400, "O corpo da requisição deve ser um objeto JSON em UTF-8.")
+        if not isinstance(dados, dict):
+            raise ErroRequisicao(400, "O corpo da requisição deve ser um objeto JSON.")
+        await rotas[caminho][1](dados, escritor)
+
+    async def servir(self, porta):
+        """Aquece o pool, inicia os consumidores da fila e atende em 127.0.0.1:`porta` até ser interrompido."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._iniciar_pool)
+        self.fila = asyncio.Queue(maxsize=self.capacidade_fila)
+        # Dois consumidores por processo: enquanto um resultado volta, o processo já tem a próxima tarefa.
+        consumidores = [asyncio.ensure_future(self._consumir()) for _ in range(self.processos * 2)]
+        servidor = await asyncio.start_server(self._atender, HOST, porta)
+        print(f"Servindo em http://{HOST}:{porta} com {self.processos} processos (fila de {self.capacidade_fila}).", flush=True)
+        try:
+            async with servidor:
+                await servidor.serve_forever()
+        finally:
+            for consumidor in consumidores:
+                consumidor.cancel()
+            self.pool.shutdown(cancel_futures=True)
+
+
+async def _ler_requisicao(leitor):
+    """Lê uma requisição HTTP/1.1 com corpo por Content-Length. Devolve None se a conexão foi fechada."""
+    linha = await leitor.readline()
+    if not linha.strip():
+        return None
+    try:
+        metodo, caminho, _ = linha.decode('latin-1').split()
+    except ValueError:
+        raise ConnectionError("Requisição malformada.")
+    cabecalhos = {}
+    while True:
+        linha = await leitor.readline()
+        if linha in (b"\r\n", b"\n", b""):
+            break
+        nome, _, valor = linha.decode('latin-1').partition(':')
+        cabecalhos[nome.strip().lower()] = valor.strip()
+    try:
+        tamanho = int(cabecalhos.get('content-length') or 0)
+    except ValueError:
+        tamanho = -1
+    if tamanho < 0:
+        raise ErroRequisicao(400, f"Content-Length inválido: {cabecalhos['content-length']!r}.")
+    if tamanho > LIMITE_CORPO:
+        raise ErroRequisicao(413, f"Corpo maior que {LIMITE_CORPO // (1024 * 1024)} MB.")
+    corpo = await leitor.readexactly(tamanho) if tamanho else b""
+    return metodo.upper(), caminho, cabecalhos, corpo
+
+
+def _cabecalho(status, tipo, extras=None):
+    linhas = [f"HTTP/1.1 {status} {STATUS_HTTP.get(status, '')}", f"Content-Type: {tipo}"]
+    linhas += [f"{nome}: {valor}" for nome, valor in (extras or {}).items()]
+    return ("\r\n".join(linhas) + "\r\n\r\n").encode('latin-1')
+
+
+def _escrever_bloco(escritor, dados):
+    escritor.write(f"{len(dados):x}\r\n".encode('ascii') + dados + b"\r\n")
+
+
+async def _responder(escritor, status, corpo, tipo, extras=None):
+    escritor.write(_cabecalho(status, tipo, {"Content-Length": str(len(corpo)), **(extras or {})}) + corpo)
+    await escritor.drain()
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Serviço HTTP local (127.0.0.1) para emitir certificados sob demanda.")
+    parser.add_argument("--porta", type=int, default=8765, help="Porta TCP (padrão: 8765).")
+    parser.add_argument("--processos", type=int, default=None, help="Processos de renderização (padrão: um por núcleo).")
+    parser.add_argument("--fila", type=int, default=256, help="Capacidade da fila de certificados (padrão: 256).")
+    parser.add_argument("--pasta-modelos", default=os.path.join(BASE_DIR, "Modelos"), help="Pasta com as imagens de modelo.")
+    parser.add_argument("--pasta-fontes", default=os.path.join(BASE_DIR, "Fontes"), help="Pasta com uma subpasta por família de fonte.")
+    parser.add_argument("--modelo", default="template.png", help="Modelo usado quando a requisição não informa um.")
+    parser.add_argument("--fonte", default="Open_Sans", help="Família usada quando a requisição não informa uma.")
+    parser.add_argument("--tamanho-fonte", type=int, default=50, help="Tamanho padrão da fonte em pontos (padrão: 50).")
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    servico = ServicoCertificados(args.pasta_modelos, args.pasta_fontes, args.modelo, args.fonte, args.tamanho_fonte, args.processos, args.fila)
+    try:
+        asyncio.run(servico.servir(args.porta))
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr); return 2
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())